@@ -170,6 +170,67 @@ export async function send_message_to_chat(chatId, message) {
 }
 
 
+// streams the answer as server sent events, onEvent(event, data) is called for every
+// tool_call, tool_result, token and done event; resolves with the final assistant message
+export async function stream_message_to_chat(chatId, message, onEvent) {
+  const response = await fetch(`${backend_url}/chats/${chatId}/messages/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream'
+    },
+    body: JSON.stringify({
+      message: message,
+    })
+  });
+
+  const contentType = response.headers.get('Content-Type') || '';
+  if (!response.ok || !contentType.startsWith('text/event-stream')) {
+    throw new Error('Failed to send message');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let finalMessage = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      const payload = data ? JSON.parse(data) : {};
+      if (event === 'error') {
+        throw new Error(payload.error || 'Failed to generate answer');
+      }
+      if (event === 'done') {
+        finalMessage = payload.message;
+      }
+      onEvent(event, payload);
+    }
+  }
+
+  if (finalMessage === null) {
+    throw new Error('Answer stream ended early');
+  }
+  return {
+    "response": finalMessage,
+  }
+}
+
+
 export async function get_chat_messages(chatId) {
   const response = await fetch(`${backend_url}/chats/${chatId}/history`, {
     method: 'GET',
@@ -1,4 +1,4 @@
-import {send_message_to_chat, get_chat_messages, check_video_status, create_new_chat, get_all_videos} from "../../api/client.js";
+import {stream_message_to_chat, get_chat_messages, check_video_status, create_new_chat, get_all_videos} from "../../api/client.js";
 
 // ---- read params ----
 const p = new URLSearchParams(location.search);
@@ -107,20 +107,47 @@ async function sendMessage() {
   input.value = "";
   sendBtn.disabled = true;
 
-  // typing indicator
+  // typing indicator, replaced by the streamed answer bubble on the first token
   const typing = typingBubble();
   content.appendChild(typing);
   scrollToBottom();
 
+  const progress = document.createElement("span");
+  progress.className = "meta";
+  typing.appendChild(progress);
+
+  let answerBubble = null;
+  let answerText = "";
+
   try {
-    const response = await send_message_to_chat(chatId, text);
+    const response = await stream_message_to_chat(chatId, text, (event, data) => {
+      if (event === "tool_call") {
+        progress.textContent = data.tool === "get_chunks_by_time"
+          ? "Reading the transcript at that time…"
+          : "Searching the video…";
+      } else if (event === "token") {
+        if (!answerBubble) {
+          answerBubble = bubble({ role: "assistant", content: "" });
+          typing.replaceWith(answerBubble);
+        }
+        answerText += data.content;
+        answerBubble.textContent = answerText;
+        scrollToBottom();
+      }
+    });
 
-    // fake assistant reply
     messages.push({
       role: "assistant",
       content: response.response,
       ts: Date.now(),
     });
+  } catch (e) {
+    console.error("Failed to get answer:", e);
+    messages.push({
+      role: "assistant",
+      content: answerText || `Error: ${e.message}`,
+      ts: Date.now(),
+    });
   } finally {
     typing.remove();
     render();
@@ -0,0 +1,46 @@
+# benchmark of TranscriptChunker on synthetic transcripts, time per snippet should stay flat as size grows
+# run from the server folder: python -m benchmarks.chunking_benchmark
+
+import random
+import time
+
+from src.controllers.chunking import TranscriptChunker
+from src.models.enums import ChunkingStrategyEnum
+
+SIZES = [10_000, 20_000, 40_000, 80_000, 160_000]
+WORDS = ["so", "the", "model", "layer", "gradient", "we", "see", "here", "that", "is", "why."]
+
+
+def make_transcript(n_snippets: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    snippets, t = [], 0.0
+    for _ in range(n_snippets):
+        duration = rng.uniform(0.8, 6.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 18)))
+        snippets.append({"text": text, "start": t, "duration": duration})
+        # occasional silent stretches
+        t += duration + (rng.uniform(5, 30) if rng.random() < 0.02 else 0.0)
+    return snippets
+
+
+def bench(chunker: TranscriptChunker, snippets: list[dict], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunker.chunk(snippets)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    transcripts = {n: make_transcript(n) for n in SIZES}
+    for strategy in ChunkingStrategyEnum:
+        chunker = TranscriptChunker(strategy=strategy.value, chunk_duration=180, token_budget=400, overlap_seconds=10)
+        print(f"strategy={strategy.value}")
+        for n, snippets in transcripts.items():
+            seconds = bench(chunker, snippets)
+            print(f"  {n:>7} snippets  {seconds * 1000:8.1f} ms  {seconds / n * 1e6:6.2f} us/snippet")
+
+
+if __name__ == "__main__":
+    main()
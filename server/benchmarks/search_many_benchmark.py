@@ -0,0 +1,109 @@
+# sequential search() calls vs one search_many() for several queries over several videos
+# run from the server folder: python -m benchmarks.search_many_benchmark
+# against the configured vector db (.env): python -m benchmarks.search_many_benchmark --live --video-ids 12 13
+
+import argparse
+import asyncio
+import random
+import time
+
+from src.stores.vectordb.vectordb_interface import VectorDBInterface
+
+QUERIES = [
+    "what is the main idea of the video",
+    "how is the model trained",
+    "which dataset is used",
+    "what are the limitations",
+    "how does the speaker define attention",
+    "what is the learning rate",
+    "summarize the conclusion",
+    "what tools are recommended",
+]
+
+
+class SimulatedRemoteDB(VectorDBInterface):
+    """Stands in for a network vector db: every search costs one round trip of `latency` seconds."""
+    def __init__(self, latency: float, jitter: float = 0.2):
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(0)
+
+    async def connect(self):
+        return
+
+    async def disconnect(self):
+        return
+
+    async def index(self, embedding_ready_data: list, video_id: str, on_progress=None):
+        return
+
+    async def search(self, user_query: str, top_k: int, video_id: str, candidates: int = None, rerank: str = None):
+        await asyncio.sleep(self.latency * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+        hits = [
+            {"_id": f"{video_id}_chunk_{i}", "_score": self.rng.random(), "fields": {"text": user_query, "source": video_id}}
+            for i in range(top_k)
+        ]
+        return {"result": {"hits": hits}}
+
+    async def delete(self, video_id: str):
+        return 0
+
+    async def list_video_ids(self):
+        return set()
+
+
+async def sequential(vector_db: VectorDBInterface, queries: list[str], top_k: int, video_ids: list[str]):
+    results = []
+    for query in queries:
+        hit_lists = []
+        for video_id in video_ids:
+            response = await vector_db.search(user_query=query, top_k=top_k, video_id=video_id)
+            hit_lists.append(response["result"]["hits"])
+        results.append(VectorDBInterface.merge_hits(hit_lists, top_k))
+    return results
+
+
+async def bench(vector_db: VectorDBInterface, queries: list[str], top_k: int, video_ids: list[str], repeat: int):
+    for name, run in (
+        ("sequential search", lambda: sequential(vector_db, queries, top_k, video_ids)),
+        ("search_many", lambda: vector_db.search_many(queries, top_k, video_ids)),
+    ):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await run()
+            timings.append(time.perf_counter() - started)
+        print(f"  {name:<18} best {min(timings) * 1000:8.1f} ms  mean {sum(timings) / len(timings) * 1000:8.1f} ms")
+
+
+async def main(args):
+    if args.live:
+        from src.stores import VectorDBFactory, EmbeddingFactory
+        from src.utils.settings import get_settings
+        settings = get_settings()
+        embedding = EmbeddingFactory().create_provider(settings.EMBEDDING_PROVIDER)
+        embedding.connect()
+        vector_db = VectorDBFactory().create_vectordb(settings.VECTOR_DB_PROVIDER, embedding=embedding)
+        await vector_db.connect()
+        try:
+            print(f"{settings.VECTOR_DB_PROVIDER}: {len(QUERIES)} queries x {len(args.video_ids)} videos, top_k={args.top_k}")
+            await bench(vector_db, QUERIES, args.top_k, args.video_ids, args.repeat)
+        finally:
+            await vector_db.disconnect()
+        return
+
+    for n_videos in (1, 3):
+        video_ids = [str(i) for i in range(n_videos)]
+        vector_db = SimulatedRemoteDB(latency=args.latency / 1000)
+        print(f"simulated {args.latency:.0f} ms round trip: {len(QUERIES)} queries x {n_videos} videos, top_k={args.top_k}")
+        await bench(vector_db, QUERIES, args.top_k, video_ids, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sequential searches with search_many.")
+    parser.add_argument("--live", action="store_true", help="use the vector db configured in .env")
+    parser.add_argument("--video-ids", nargs="+", default=[], help="videos to search with --live")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=40.0, help="simulated round trip in ms")
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine,AsyncEngine
 from sqlalchemy.orm import sessionmaker
@@ -10,10 +12,13 @@ from sqlalchemy import text
 from .routes import base_router, chat_router,videos_router
 
 from .utils.settings import get_settings
+from .utils.latency_stats import LatencyStats
 from .models.db_scheme import SQLAlchemyBase
 
 
-from .stores import VectorDBFactory, GenerationFactory
+from .stores.embedding.embedding_enum import EmbeddingType
+from .stores import VectorDBFactory, GenerationFactory, LLMCacheFactory, EmbeddingFactory, BM25Store, RetrievalCache, SemanticAnswerCache, ResilientVectorDB
+from .controllers import IngestionWorkerPool, VectorCleanupController, LocalRetrievalFallback, SpeculativeRetrieval, ChatMemoryController, PromptAssembler
 
 
 async def create_tables(engine: AsyncEngine, Base):
@@ -52,32 +57,133 @@ async def lifespan(app: FastAPI):
         raise e
     
 
+    # setup embedding provider, used by the vector dbs that do not embed on their side
+    try:
+        embedding_factory = EmbeddingFactory()
+        embedding = embedding_factory.create_provider(get_settings().EMBEDDING_PROVIDER)
+        embedding.connect()
+        app.state.embedding = embedding
+    except Exception as e:
+        print(f"Error setting up embedding provider: {e}")
+        raise e
+
     # setup vector db
     try:
         vector_db_factory = VectorDBFactory()
-        vector_db = vector_db_factory.create_vectordb(get_settings().VECTOR_DB_PROVIDER)
+        vector_db = vector_db_factory.create_vectordb(get_settings().VECTOR_DB_PROVIDER, embedding=embedding)
         await vector_db.connect()
         app.state.vector_db = vector_db
     except Exception as e:
         print(f"Error setting up vector database: {e}")
         raise e
     
+    # setup the per-video BM25 indexes used for hybrid retrieval
+    lexical_index = BM25Store(directory=get_settings().LEXICAL_INDEX_DIR, max_loaded=get_settings().LEXICAL_MAX_LOADED)
+    lexical_index.connect()
+    app.state.lexical_index = lexical_index
+
+    # deadlines, hedging and a circuit breaker around vector search, served locally while the provider is down
+    vector_db = ResilientVectorDB(
+        vector_db,
+        fallback=LocalRetrievalFallback(db_client=db_client, lexical_index=lexical_index).search,
+        deadline_seconds=get_settings().VECTOR_SEARCH_DEADLINE_SECONDS,
+        hedging=get_settings().VECTOR_SEARCH_HEDGING,
+        hedge_min_samples=get_settings().VECTOR_SEARCH_HEDGE_MIN_SAMPLES,
+        failure_threshold=get_settings().VECTOR_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds=get_settings().VECTOR_BREAKER_RESET_SECONDS,
+    )
+    app.state.vector_db = vector_db
+
+    # short lived cache of search results shared by all chats
+    retrieval_cache = None
+    if get_settings().RETRIEVAL_CACHE_MAX_ENTRIES > 0:
+        retrieval_cache = RetrievalCache(
+            ttl_seconds=get_settings().RETRIEVAL_CACHE_TTL_SECONDS,
+            max_entries=get_settings().RETRIEVAL_CACHE_MAX_ENTRIES,
+        )
+    app.state.retrieval_cache = retrieval_cache
+
+    # answers of standalone questions, reused for near duplicate questions on the same video
+    # only with a semantic embedding, the hashing embedding scores opposite questions above the threshold
+    answer_cache = None
+    if get_settings().ANSWER_CACHE_MAX_ENTRIES > 0 and get_settings().EMBEDDING_PROVIDER != EmbeddingType.HASHING.value:
+        answer_cache = SemanticAnswerCache(
+            embedding=embedding,
+            threshold=get_settings().ANSWER_CACHE_SIMILARITY,
+            ttl_seconds=get_settings().ANSWER_CACHE_TTL_SECONDS,
+            max_entries=get_settings().ANSWER_CACHE_MAX_ENTRIES,
+            max_bytes=get_settings().ANSWER_CACHE_MAX_BYTES,
+        )
+    elif get_settings().ANSWER_CACHE_MAX_ENTRIES > 0:
+        print("Answer cache disabled: it needs a semantic embedding provider, EMBEDDING_PROVIDER is hashing")
+    app.state.answer_cache = answer_cache
+
+    # setup llm output cache
+    try:
+        llm_cache_factory = LLMCacheFactory()
+        llm_cache = llm_cache_factory.create_cache(get_settings().LLM_CACHE_PROVIDER)
+        if llm_cache is not None:
+            await llm_cache.connect()
+        app.state.llm_cache = llm_cache
+    except Exception as e:
+        print(f"Error setting up llm cache: {e}")
+        raise e
+
     # setup generation model
     try:
         generation_factory = GenerationFactory()
-        generation_model = generation_factory.create_provider(get_settings().GENERATION_MODEL_PROVIDER)
+        generation_model = generation_factory.create_provider(get_settings().GENERATION_MODEL_PROVIDER, llm_cache=llm_cache)
         generation_model.connect()
         app.state.generation_model = generation_model
     except Exception as e:
         print(f"Error setting up generation model: {e}")
         raise e
+
+    # rolling per-chat memory, older messages are summarized in the background
+    app.state.chat_memory = ChatMemoryController(db_client=db_client, generation=generation_model)
+
+    # per-video system prompts, shared by every chat answer
+    app.state.prompt_assembler = PromptAssembler(max_entries=get_settings().PROMPT_PREFIX_CACHE_MAX_ENTRIES)
+
+    # speculative retrieval counters are shared by every chat answer
+    app.state.speculation = SpeculativeRetrieval(match_threshold=get_settings().SPECULATIVE_MATCH_THRESHOLD) if get_settings().SPECULATIVE_RETRIEVAL else None
+
+    # time to first token and total duration of streamed chat answers, reported on /metrics
+    app.state.chat_latency = LatencyStats()
+    
+    # setup shared http client and the executor for blocking transcript fetches
+    app.state.http_client = httpx.AsyncClient(
+        timeout=get_settings().YOUTUBE_API_TIMEOUT,
+        limits=httpx.Limits(max_connections=get_settings().YOUTUBE_HTTP_MAX_CONNECTIONS, max_keepalive_connections=get_settings().YOUTUBE_HTTP_MAX_CONNECTIONS),
+    )
+    app.state.transcript_executor = ThreadPoolExecutor(max_workers=get_settings().TRANSCRIPT_FETCH_WORKERS, thread_name_prefix="transcript")
+
+    # setup ingestion workers, unfinished jobs from a previous run are resumed
+    try:
+        ingestion_pool = IngestionWorkerPool(db_client=db_client, vector_db=vector_db, generation_model=generation_model, lexical_index=lexical_index, retrieval_cache=retrieval_cache, answer_cache=answer_cache)
+        await ingestion_pool.start()
+        app.state.ingestion_pool = ingestion_pool
+    except Exception as e:
+        print(f"Error setting up ingestion workers: {e}")
+        raise e
+    
+    # background deletion of the vectors of deleted videos
+    app.state.vector_cleanup = VectorCleanupController(db_client=db_client, vector_db=vector_db, lexical_index=lexical_index, retrieval_cache=retrieval_cache, answer_cache=answer_cache)
     
     print("Starting up fastapi...")
     yield
     # --- shutdown ---
+    await app.state.ingestion_pool.stop()
+    await app.state.vector_cleanup.wait()
+    await app.state.chat_memory.stop()
+    await app.state.http_client.aclose()
+    app.state.transcript_executor.shutdown(wait=False, cancel_futures=True)
     await db_engine.dispose()
     await app.state.vector_db.disconnect()
+    app.state.embedding.disconnect()
     app.state.generation_model.disconnect()
+    if app.state.llm_cache is not None:
+        await app.state.llm_cache.disconnect()
     print("Shutting down fastapi...")
 
 
@@ -0,0 +1,39 @@
+# move pinecone records from the legacy "default" namespace to the layout set in PINECONE_NAMESPACE_LAYOUT
+# run from the server folder, with PINECONE_DUAL_READ=true on the running servers until it finishes:
+#   python -m src.commands.migrate_namespaces [--batch-size 100] [--video-ids 12 13] [--dry-run]
+
+import argparse
+import asyncio
+
+from ..stores import VectorDBFactory
+from ..stores.vectordb.vectordb_enum import VectorDBType
+from ..utils.settings import get_settings
+
+
+async def main(batch_size: int, video_ids: list[str], dry_run: bool):
+    settings = get_settings()
+    if settings.VECTOR_DB_PROVIDER != VectorDBType.PINECONE.value:
+        raise SystemExit(f"Namespace migration only applies to pinecone, VECTOR_DB_PROVIDER is {settings.VECTOR_DB_PROVIDER}")
+
+    vector_db = VectorDBFactory().create_vectordb(settings.VECTOR_DB_PROVIDER)
+    await vector_db.connect()
+    try:
+        result = await vector_db.migrate_namespaces(
+            batch_size=batch_size,
+            dry_run=dry_run,
+            video_ids=set(video_ids) if video_ids else None,
+        )
+        print(f"Layout: {result['layout']}")
+        print(f"Records to move: {result['records']}, moved: {result['moved']}, skipped: {result['skipped']}"
+              f"{' (dry run)' if dry_run else ''}")
+    finally:
+        await vector_db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move records out of the legacy shared pinecone namespace.")
+    parser.add_argument("--batch-size", type=int, default=100, help="records fetched, upserted and deleted per step")
+    parser.add_argument("--video-ids", nargs="+", default=[], help="only move these videos")
+    parser.add_argument("--dry-run", action="store_true", help="only count the records to move")
+    args = parser.parse_args()
+    asyncio.run(main(batch_size=args.batch_size, video_ids=args.video_ids, dry_run=args.dry_run))
@@ -0,0 +1,37 @@
+# purge vectors of videos that no longer exist in Postgres
+# run from the server folder: python -m src.commands.reconcile_vectors [--dry-run]
+
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..controllers import VectorCleanupController
+from ..stores import VectorDBFactory, EmbeddingFactory
+from ..utils.settings import get_settings
+
+
+async def main(dry_run: bool):
+    settings = get_settings()
+    postgres_conn = f"postgresql+asyncpg://{settings.USER}:{settings.PASSWORD}@{settings.HOST}:{settings.PORT}/{settings.DBNAME}"
+    db_engine = create_async_engine(postgres_conn)
+    db_client = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    embedding = EmbeddingFactory().create_provider(settings.EMBEDDING_PROVIDER)
+    vector_db = VectorDBFactory().create_vectordb(settings.VECTOR_DB_PROVIDER, embedding=embedding)
+    await vector_db.connect()
+    try:
+        result = await VectorCleanupController(db_client=db_client, vector_db=vector_db).reconcile(dry_run=dry_run)
+        print(f"Orphaned videos: {result['orphan_video_ids']}")
+        print(f"Deleted records: {result['deleted_records']}{' (dry run)' if dry_run else ''}")
+    finally:
+        await vector_db.disconnect()
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete vectors whose video was removed from Postgres.")
+    parser.add_argument("--dry-run", action="store_true", help="only report the orphaned videos")
+    args = parser.parse_args()
+    asyncio.run(main(dry_run=args.dry_run))
@@ -1,3 +1,9 @@
 from .video import VideoController
 from .nlp import NLPController
-from .agent import AgMPentController
\ No newline at end of file
+from .agent import AgMPentController
+from .ingestion import IngestionWorkerPool
+from .cleanup import VectorCleanupController
+from .retrieval_fallback import LocalRetrievalFallback
+from .speculation import SpeculativeRetrieval
+from .chat_memory import ChatMemoryController
+from .prompt_assembler import PromptAssembler
@@ -1,44 +1,266 @@
-from ..stores import VectorDBInterface,GenerationInterface,CHAT_SYSTEM_PROMPT,CHAT_USER_PROMPT
+import asyncio
+import json
+import re
+import time
+from .speculation import SpeculativeRetrieval
+from .prompt_assembler import PromptAssembler
+from ..stores import VectorDBInterface,GenerationInterface,BM25Store,RetrievalCache,SemanticAnswerCache
+from ..models.enums import RetrievalModeEnum
+from ..models.db_models import TranscriptChunkModel
+from ..utils.rank_fusion import reciprocal_rank_fusion
+from ..utils.settings import get_settings
 
+QUOTED_PATTERN = re.compile(r'"([^"]+)"|`([^`]+)`')
+WORD_PATTERN = re.compile(r"[\w.]+", re.UNICODE)
+# words that make a question depend on the previous turns of the chat
+FOLLOW_UP_WORDS = {"it", "its", "that", "those", "these", "they", "them", "he", "she", "him", "her",
+                   "above", "previous", "earlier", "again", "more", "else", "also", "continue"}
 
 
 class AgMPentController:
-    def __init__(self,vector_db:VectorDBInterface,generation:GenerationInterface,video_id:str):
+    def __init__(self,vector_db:VectorDBInterface,generation:GenerationInterface,video_id:str,lexical_index:BM25Store=None,
+                 retrieval_cache:RetrievalCache=None,answer_cache:SemanticAnswerCache=None,db_client=None,
+                 speculation:SpeculativeRetrieval=None,prompt_assembler:PromptAssembler=None):
         self.vector_db=vector_db
         self.generation=generation
         self.video_id=video_id
+        self.lexical_index=lexical_index
+        self.retrieval_cache=retrieval_cache
+        self.answer_cache=answer_cache
+        self.chunk_model=TranscriptChunkModel(db_client) if db_client is not None else None
+        self.speculation=speculation
+        self.prompt_assembler=prompt_assembler or PromptAssembler(max_entries=0)
+        # the in flight speculative search of this answer: query, task, start and end times
+        self.speculative=None
+        self.TIME_WINDOW_DEFAULT=60
         self.MAX_CALLS=3 
+        self.retrieval_mode=get_settings().RETRIEVAL_MODE
+        self.retrieval_candidates=get_settings().RETRIEVAL_CANDIDATES
+        self.rrf_k=get_settings().RRF_K
 
-    async def get_relevant_chunks(self, user_query: str, top_k: int=3):
-        """Get relevant chunks from the vector database based on user query."""
-        print(f"Searching for relevant chunks with query: {user_query} and top_k: {top_k} video_id: {self.video_id}")
+    def _keyword_terms(self, user_query: str) -> set[str]:
+        """Terms that need an exact match: quoted phrases, numbers, code identifiers and mid-sentence names."""
+        keywords = set()
+        for match in QUOTED_PATTERN.finditer(user_query):
+            keywords.update((match.group(1) or match.group(2)).lower().split())
+        for position, word in enumerate(WORD_PATTERN.findall(user_query)):
+            word = word.strip(".")
+            if not word:
+                continue
+            is_identifier = "_" in word or "." in word or (word[1:] != word[1:].lower() and not word.isupper())
+            is_name = position > 0 and word[0].isupper()
+            if any(c.isdigit() for c in word) or is_identifier or is_name:
+                keywords.add(word.lower())
+        return keywords
+
+    def _answers_keywords(self, hits: list, keywords: set[str]) -> bool:
+        """True when the best lexical hit contains every keyword of the query."""
+        if not hits or not keywords:
+            return False
+        text = hits[0]["fields"].get("text", "").lower()
+        return all(keyword in text for keyword in keywords)
+
+    async def _dense_hits(self, user_query: str, top_k: int) -> tuple[list, bool]:
+        """(hits, fallback), fallback is True when the vector db was down and the hits come from the local fallback."""
         results = await self.vector_db.search(user_query=user_query, top_k=top_k, video_id=self.video_id)
-        if not results or results.get("result") is None:
-            return "No relevant chunks found."
-        if not results.get("result") or len(results["result"]["hits"]) == 0:
+        if not results or not results.get("result"):
+            return [], False
+        return results["result"].get("hits", []), bool(results.get("fallback"))
+
+    async def _lexical_hits(self, user_query: str, top_k: int) -> list:
+        if self.lexical_index is None:
+            return []
+        results = await self.lexical_index.search(user_query=user_query, top_k=top_k, video_id=self.video_id)
+        return results["result"]["hits"]
+
+    async def get_relevant_chunks(self, user_query: str, top_k: int=3):
+        """Get relevant chunks from the vector database, the lexical index or both, depending on the retrieval mode."""
+        print(f"Searching for relevant chunks with query: {user_query} and top_k: {top_k} video_id: {self.video_id} mode: {self.retrieval_mode}")
+        if self.retrieval_cache is not None:
+            # degraded results served by the vector db fallback are not cached
+            hits, _ = await self.retrieval_cache.get_or_fetch(
+                self.video_id, user_query, top_k, lambda: self._search_hits(user_query, top_k),
+                cacheable=lambda value: not value[1]
+            )
+        else:
+            hits, _ = await self._search_hits(user_query, top_k)
+
+        if len(hits) == 0:
             return "No relevant chunks found."
         
         preprocessed_results = [
             hit["fields"].get("text", "")
-            for hit in results["result"]["hits"]
+            for hit in hits
         ]
         return preprocessed_results
+
+    async def _search_hits(self, user_query: str, top_k: int) -> tuple[list, bool]:
+        """(hits, fallback) of the retrieval mode, fallback as returned by _dense_hits."""
+        candidates = max(top_k, self.retrieval_candidates)
+        fallback = False
+
+        if self.retrieval_mode == RetrievalModeEnum.DENSE.value or self.lexical_index is None:
+            hits, fallback = await self._dense_hits(user_query, top_k)
+        elif self.retrieval_mode == RetrievalModeEnum.LEXICAL_FIRST.value:
+            lexical_hits = await self._lexical_hits(user_query, candidates)
+            if self._answers_keywords(lexical_hits, self._keyword_terms(user_query)):
+                print("Keyword query answered from the lexical index")
+                hits = lexical_hits[:top_k]
+            else:
+                dense_hits, fallback = await self._dense_hits(user_query, candidates)
+                hits = reciprocal_rank_fusion([dense_hits, lexical_hits], top_k=top_k, k=self.rrf_k)
+        else:
+            (dense_hits, fallback), lexical_hits = await asyncio.gather(
+                self._dense_hits(user_query, candidates),
+                self._lexical_hits(user_query, candidates),
+            )
+            hits = reciprocal_rank_fusion([dense_hits, lexical_hits], top_k=top_k, k=self.rrf_k)
+        return hits, fallback
     
 
-    async def get_model_answer(self, user_query: str, history: list = None, summary: str = '') -> str:
-        """Generate an answer based on the user query and relevant chunks."""
+    @staticmethod
+    def _parse_timestamp(value) -> float | None:
+        """Seconds from a number or a 'ss', 'mm:ss' or 'hh:mm:ss' string, None if it cannot be parsed."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        try:
+            seconds = 0.0
+            for part in value.strip().split(":"):
+                seconds = seconds * 60 + float(part)
+            return seconds
+        except ValueError:
+            return None
+
+    async def get_chunks_by_time(self, start, end=None):
+        """Get the transcript chunks overlapping a time window straight from Postgres, no vector search."""
+        start_seconds = self._parse_timestamp(start)
+        end_seconds = self._parse_timestamp(end) if end is not None else None
+        if start_seconds is None:
+            return "Invalid start time, use seconds or mm:ss."
+        if end_seconds is None or end_seconds < start_seconds:
+            end_seconds = start_seconds + self.TIME_WINDOW_DEFAULT
+        print(f"Fetching chunks between {start_seconds}s and {end_seconds}s for video_id: {self.video_id}")
+        if self.chunk_model is None:
+            return "No transcript available for this time range."
+
+        chunks = await self.chunk_model.get_chunks_by_time(video_id=self.video_id, start_seconds=start_seconds, end_seconds=end_seconds)
+        if not chunks:
+            return "No transcript available for this time range."
+        return [f"From {chunk.start_time} to {chunk.end_time}: {chunk.text}" for chunk in chunks]
+
+    def _start_speculation(self, user_query: str, history: list, chat_summary: str = ''):
+        """Search with the raw question while the first model call runs, follow-ups are skipped since the model rewrites them."""
+        if self.speculation is None or not self._is_standalone(user_query, history, chat_summary):
+            return
+        task = asyncio.create_task(self.get_relevant_chunks(user_query=user_query, top_k=self.speculation.top_k))
+        speculative = {"query": user_query, "task": task, "started_at": time.perf_counter(), "finished_at": None}
+
+        def finished(_):
+            speculative["finished_at"] = time.perf_counter()
+
+        task.add_done_callback(finished)
+        self.speculative = speculative
+        self.speculation.started += 1
+
+    def _take_speculation(self, query: str, top_k: int):
+        """The speculative search task when it matches the tool call, only the first matching call of the answer gets it."""
+        speculative = self.speculative
+        if speculative is None or not self.speculation.matches(speculative["query"], query, top_k):
+            return None
+        self.speculative = None
+        self.speculation.record_hit(speculative["started_at"], speculative["finished_at"])
+        print(f"Reusing the speculative search for query: {query}")
+        return speculative["task"]
+
+    async def _finish_speculation(self, tool_called: bool):
+        """Cancel a speculative search nobody reused, counted as a miss when the model searched with another query."""
+        speculative, self.speculative = self.speculative, None
+        if speculative is None:
+            return
+        if tool_called:
+            self.speculation.misses += 1
+        else:
+            self.speculation.unused += 1
+        speculative["task"].cancel()
+        await asyncio.gather(speculative["task"], return_exceptions=True)
+
+    async def _run_tool(self, name: str, args: dict, user_query: str):
+        if name == "get_chunks_by_time":
+            return await self.get_chunks_by_time(start=args.get("start"), end=args.get("end"))
+        query = args.get("user_query", user_query)
+        top_k = args.get("top_k", 3)
+        prefetched = self._take_speculation(query, top_k)
+        if prefetched is not None:
+            chunks = await prefetched
+            return chunks[:top_k] if isinstance(chunks, list) else chunks
+        return await self.get_relevant_chunks(user_query=query, top_k=top_k)
+
+    async def _run_tool_calls(self, tool_calls: list[dict], message: list, user_query: str, content: str = None):
+        """Run every tool call of a turn concurrently and append the assistant turn and one tool message per call,
+        so all results go back to the model in a single follow-up request."""
+        message.append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {"id": call["id"], "type": "function",
+                 "function": {"name": call["name"], "arguments": json.dumps(call["arguments"] or {})}}
+                for call in tool_calls
+            ]
+        })
+
+        async def run(call: dict):
+            if call["arguments"] is None:
+                return "Invalid tool arguments, expected a json object."
+            return await self._run_tool(call["name"], call["arguments"], user_query)
+
+        responses = await asyncio.gather(*[run(call) for call in tool_calls])
+        for call, response in zip(tool_calls, responses):
+            message.append({"role": "tool", "tool_call_id": call["id"], "content": str(response)})
+        print(f"Ran tools {[call['name'] for call in tool_calls]} concurrently")
+
+    def _is_standalone(self, user_query: str, history: list, chat_summary: str = '') -> bool:
+        """A question can be answered without the chat history when it opens the chat or has no follow-up words."""
+        previous_turns = [msg for msg in history if msg.get("content") != user_query]
+        if not previous_turns and not chat_summary:
+            return True
+        words = set(re.findall(r"\w+", user_query.lower()))
+        return not (words & FOLLOW_UP_WORDS) and not user_query.lower().startswith(("and ", "what about", "how about"))
+
+    async def get_model_answer(self, user_query: str, history: list = None, summary: str = '', chat_summary: str = '') -> str:
+        """Answer from the semantic answer cache when a near duplicate standalone question was answered before.
+        history holds the recent messages of the chat, chat_summary the rolling summary of the older ones."""
         if history is None:
             history = []
+        if self.answer_cache is None or not self._is_standalone(user_query, history, chat_summary):
+            return await self._generate_model_answer(user_query=user_query, history=history, summary=summary, chat_summary=chat_summary)
+
+        generation = self.answer_cache.generation(self.video_id)
+        cached_answer = await self.answer_cache.lookup(self.video_id, user_query, summary)
+        if cached_answer is not None:
+            return cached_answer
+
+        answer, completed = await self._generate_model_answer(user_query=user_query, history=history, summary=summary, chat_summary=chat_summary, with_status=True)
+        if completed and answer:
+            await self.answer_cache.store(self.video_id, user_query, answer, summary, generation)
+        return answer
+
+    async def _generate_model_answer(self, user_query: str, history: list, summary: str = '', chat_summary: str = '', with_status: bool = False):
+        """Generate an answer based on the user query and relevant chunks.
+        With with_status, returns (answer, completed) where completed is False when the tool loop did not finish."""
         
         # Construct the message for the generation model
-        user_prompt = CHAT_USER_PROMPT.format(user_query=user_query, history=history)
-        system_prompt = CHAT_SYSTEM_PROMPT.format(video_summary=summary)
+        message = self.prompt_assembler.build(self.video_id, summary, user_query, history, chat_summary)
 
-        message = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+        self._start_speculation(user_query, history, chat_summary)
+        try:
+            return await self._tool_loop(message, user_query, with_status)
+        finally:
+            await self._finish_speculation(tool_called=False)
 
+    async def _tool_loop(self, message: list, user_query: str, with_status: bool):
+        """Call the model and run the tools it asks for until it answers, at most MAX_CALLS rounds."""
         calls = 0
         answer = None
         
@@ -46,47 +268,82 @@ class AgMPentController:
             calls += 1
             answer = await self.generation.generate_answer(message=message)
             
-            # check if the answer is a function call
-            if getattr(answer, "function_call", None):
-                print("Function call detected")
-                args = self.generation.get_tool_agrs(answer)
-                
-                if args:
-                    # First, add the assistant's message with the function call
-                    assistant_message = {
-                        "role": "assistant",
-                        "content": None,
-                        "function_call": answer.function_call
-                    }
-                    print("Assistant message with function call:", assistant_message)
-                    message.append(assistant_message)
-                    
-                    # Then get the tool response
-                    tool_response = await self.get_relevant_chunks(
-                        user_query=args.get("user_query", user_query), 
-                        top_k=args.get("top_k", 3)
-                    )
-                    
-                    # Finally, add the function response message
-                    tool_message = {
-                        "role": "function",
-                        "name": "get_relevant_chunks",
-                        "content": str(tool_response)
-                    }
-                    print("Tool response message:", tool_message)
-                    message.append(tool_message)
-                    # Continue the loop to get the final answer
-                else:
-                    # If args is None/empty, break to avoid infinite loop
-                    print("No args found for function call")
+            # check if the answer asks for tool calls, a compound question gets all of them in one turn
+            tool_calls = self.generation.get_tool_agrs(answer)
+            if tool_calls:
+                print(f"{len(tool_calls)} tool calls detected")
+                if not any(call["arguments"] for call in tool_calls):
+                    # If every call has None/empty args, break to avoid infinite loop
+                    print("No args found for tool calls")
                     break
+                await self._run_tool_calls(tool_calls, message, user_query, content=answer.content)
+                # a speculative search still pending after the first round was not reused
+                await self._finish_speculation(tool_called=True)
+                # Continue the loop to get the final answer
             else:
                 # Got a regular response, return it
                 print("Regular response received")
-                return answer.content
+                return (answer.content, True) if with_status else answer.content
         
         # If we've exhausted MAX_CALLS or broke out of loop
-        if answer and hasattr(answer, 'content'):
-            return answer.content
+        if answer and getattr(answer, 'content', None):
+            content = answer.content
         else:
-            return 'Unable to generate a proper response. Please try again.'
\ No newline at end of file
+            content = 'Unable to generate a proper response. Please try again.'
+        return (content, False) if with_status else content
+
+    async def stream_model_answer(self, user_query: str, history: list = None, summary: str = '', chat_summary: str = ''):
+        """Streaming variant of get_model_answer, an async generator of (event, data) pairs:
+        ("tool_call", {"tool", "args"}) and ("tool_result", {"tool"}) for every call of a tool round,
+        ("token", {"content"}) for every text delta of the answer, then one ("done", {"message", "completed", "cached"}).
+        Text the model streams before a tool round is part of the final message, so the saved answer is what the client showed."""
+        if history is None:
+            history = []
+        use_cache = self.answer_cache is not None and self._is_standalone(user_query, history, chat_summary)
+        if use_cache:
+            generation = self.answer_cache.generation(self.video_id)
+            cached_answer = await self.answer_cache.lookup(self.video_id, user_query, summary)
+            if cached_answer is not None:
+                yield "token", {"content": cached_answer}
+                yield "done", {"message": cached_answer, "completed": True, "cached": True}
+                return
+
+        message = self.prompt_assembler.build(self.video_id, summary, user_query, history, chat_summary)
+
+        streamed = ""
+        self._start_speculation(user_query, history, chat_summary)
+        try:
+            for _ in range(self.MAX_CALLS):
+                tool_calls = None
+                async for event in self.generation.generate_answer_stream(message=message):
+                    if event["type"] == "token":
+                        yield "token", {"content": event["content"]}
+                    elif event["type"] == "tool_calls":
+                        tool_calls = event["calls"]
+                        content = event.get("content") or ""
+                    else:
+                        answer = streamed + event["content"]
+                        await self._finish_speculation(tool_called=False)
+                        if use_cache and answer:
+                            await self.answer_cache.store(self.video_id, user_query, answer, summary, generation)
+                        yield "done", {"message": answer, "completed": True, "cached": False}
+                        return
+
+                if not any(call["arguments"] for call in tool_calls):
+                    print("No args found for tool calls")
+                    break
+
+                if content:
+                    # keep the text already shown apart from the answer that follows the tool round
+                    streamed += content + "\n\n"
+                    yield "token", {"content": "\n\n"}
+                for call in tool_calls:
+                    yield "tool_call", {"tool": call["name"], "args": call["arguments"]}
+                await self._run_tool_calls(tool_calls, message, user_query, content=content or None)
+                await self._finish_speculation(tool_called=True)
+                for call in tool_calls:
+                    yield "tool_result", {"tool": call["name"]}
+        finally:
+            await self._finish_speculation(tool_called=False)
+
+        yield "done", {"message": streamed + "Unable to generate a proper response. Please try again.", "completed": False, "cached": False}
@@ -0,0 +1,111 @@
+import asyncio
+from ..models.db_models import MessageModel, ChatMemoryModel
+from ..stores import GenerationInterface
+from ..utils.settings import get_settings
+from ..utils.tokens import estimate_tokens, CHARS_PER_TOKEN
+
+
+class ChatMemoryController:
+    """
+    Rolling memory of every chat: the newest messages that fit the history token budget are sent verbatim,
+    everything older is folded into a per-chat summary stored in chat_memories.
+    The summary is extended in the background after each answer, so the prompt stays about the same size
+    however long the chat gets and no request waits on a summarization call.
+    """
+    def __init__(self, db_client, generation: GenerationInterface):
+        self.message_model = MessageModel(db_client)
+        self.memory_model = ChatMemoryModel(db_client)
+        self.generation = generation
+        self.token_budget = get_settings().CHAT_HISTORY_TOKEN_BUDGET
+        # one compaction per chat at a time, a chat asking again while one runs is compacted once more after it
+        self.tasks: dict[int, asyncio.Task] = {}
+        self.dirty: set[int] = set()
+        self.compactions = 0
+        self.compacted_messages = 0
+        self.failures = 0
+
+
+    def _split(self, messages: list) -> tuple[list, list]:
+        """Split unsummarized messages (oldest first) into (older ones to fold, newest ones within the token budget).
+        The newest message is always kept, cut to the budget when it is longer on its own."""
+        kept_tokens = 0
+        start = len(messages)
+        for i in range(len(messages) - 1, -1, -1):
+            tokens = estimate_tokens(messages[i].content) + 4
+            if start < len(messages) and kept_tokens + tokens > self.token_budget:
+                break
+            kept_tokens += tokens
+            start = i
+        return messages[:start], messages[start:]
+
+
+    async def build_history(self, chat_id: int) -> tuple[str, list[dict]]:
+        """(rolling summary, recent messages [{'role','content'}]) of the chat for the next prompt."""
+        memory = await self.memory_model.get_memory(chat_id=chat_id)
+        messages = await self.message_model.get_messages_after(chat_id=chat_id, after_message_id=memory.last_message_id if memory else 0)
+        _, recent = self._split(messages)
+        history = [{"role": msg.role, "content": msg.content} for msg in recent]
+        if history and estimate_tokens(history[-1]["content"]) > self.token_budget:
+            history[-1]["content"] = history[-1]["content"][: self.token_budget * CHARS_PER_TOKEN]
+        return (memory.summary if memory else ""), history
+
+
+    def schedule_compaction(self, chat_id: int):
+        """Fold the messages that no longer fit the history budget into the chat summary, in the background."""
+        task = self.tasks.get(chat_id)
+        if task is not None and not task.done():
+            self.dirty.add(chat_id)
+            return
+        self.tasks[chat_id] = asyncio.create_task(self._compact(chat_id))
+
+
+    async def _compact(self, chat_id: int):
+        try:
+            while True:
+                self.dirty.discard(chat_id)
+                memory = await self.memory_model.get_memory(chat_id=chat_id)
+                messages = await self.message_model.get_messages_after(chat_id=chat_id, after_message_id=memory.last_message_id if memory else 0)
+                older, _ = self._split(messages)
+                if older:
+                    summary = await self.generation.summarize_conversation(
+                        previous_summary=memory.summary if memory else "",
+                        messages=[{"role": msg.role, "content": msg.content} for msg in older]
+                    )
+                    await self.memory_model.save_memory(chat_id=chat_id, summary=summary, last_message_id=older[-1].id)
+                    self.compactions += 1
+                    self.compacted_messages += len(older)
+                    print(f"Folded {len(older)} messages of chat {chat_id} into its summary")
+                if chat_id not in self.dirty:
+                    return
+        except Exception as e:
+            self.failures += 1
+            print(f"Error compacting the memory of chat {chat_id}: {e}")
+        finally:
+            self.tasks.pop(chat_id, None)
+
+
+    async def forget(self, chat_id: int):
+        """Stop a running compaction and delete the summary of a deleted chat."""
+        task = self.tasks.pop(chat_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.dirty.discard(chat_id)
+        await self.memory_model.delete_memory(chat_id=chat_id)
+
+
+    async def stop(self):
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks = {}
+
+
+    def stats(self) -> dict:
+        return {
+            "compactions": self.compactions,
+            "compacted_messages": self.compacted_messages,
+            "failures": self.failures,
+            "running": len(self.tasks),
+        }
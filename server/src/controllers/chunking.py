@@ -0,0 +1,118 @@
+
+#  split a transcript into chunks from flat arrays of snippet start, duration and size
+#  boundaries are found with prefix sums + binary search, so the cost is linear in the number of snippets
+
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from ..models.enums import ChunkingStrategyEnum
+from ..utils.tokens import CHARS_PER_TOKEN
+
+SENTENCE_END_CHARS = (".", "?", "!", "。", "؟", "…")
+
+
+class TranscriptChunker:
+    def __init__(self, strategy: str = ChunkingStrategyEnum.DURATION.value, chunk_duration: float = 180,
+                 token_budget: int = 400, overlap_seconds: float = 0.0):
+        """
+        Args:
+            strategy (str): 'duration' caps the summed snippet duration, 'tokens' caps the estimated tokens,
+                'sentence' caps the duration but prefers to cut after a snippet that ends a sentence.
+            chunk_duration (float): max seconds of speech per chunk ('duration' and 'sentence').
+            token_budget (int): max estimated tokens per chunk ('tokens').
+            overlap_seconds (float): the next chunk starts at the first snippet within this many seconds
+                before the end of the previous chunk. Must be shorter than chunk_duration; with 'tokens'
+                it is capped at half the time span of each chunk.
+        """
+        if strategy not in [s.value for s in ChunkingStrategyEnum]:
+            raise ValueError(f"Unknown chunking strategy: {strategy}")
+        if overlap_seconds < 0:
+            raise ValueError(f"overlap_seconds must be >= 0, got {overlap_seconds}")
+        if strategy != ChunkingStrategyEnum.TOKENS.value and overlap_seconds >= chunk_duration:
+            raise ValueError(f"overlap_seconds ({overlap_seconds}) must be shorter than chunk_duration ({chunk_duration})")
+        self.strategy = strategy
+        self.chunk_duration = float(chunk_duration)
+        self.token_budget = int(token_budget)
+        self.overlap_seconds = float(overlap_seconds)
+
+
+    def snippets_to_arrays(self, snippets: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """Flatten [{'text','start','duration'}] into start, duration and token count arrays plus the texts."""
+        n = len(snippets)
+        starts = np.fromiter((s["start"] for s in snippets), dtype=np.float64, count=n)
+        durations = np.fromiter((s["duration"] for s in snippets), dtype=np.float64, count=n)
+        texts = [s["text"] for s in snippets]
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        tokens = np.maximum(lengths // CHARS_PER_TOKEN, 1)
+        return starts, durations, tokens, texts
+
+
+    def _sentence_ends(self, texts: List[str]) -> np.ndarray:
+        """Indices of snippets whose text ends a sentence."""
+        return np.fromiter(
+            (i for i, t in enumerate(texts) if t.rstrip().endswith(SENTENCE_END_CHARS)),
+            dtype=np.int64,
+        )
+
+
+    def split(self, starts: np.ndarray, durations: np.ndarray, tokens: np.ndarray, texts: List[str]) -> List[Tuple[int, int]]:
+        """
+        Return the [begin, end) snippet ranges of every chunk.
+        A chunk takes the longest run of snippets whose summed weight fits the limit, and at least one snippet.
+        """
+        n = len(starts)
+        if n == 0:
+            return []
+
+        if self.strategy == ChunkingStrategyEnum.TOKENS.value:
+            weights, limit = tokens.astype(np.float64), float(self.token_budget)
+        else:
+            weights, limit = durations, self.chunk_duration
+
+        # prefix[i] is the weight of snippets [0, i)
+        prefix = np.concatenate(([0.0], np.cumsum(weights)))
+        ends = starts + durations
+        sentence_ends = self._sentence_ends(texts) if self.strategy == ChunkingStrategyEnum.SENTENCE.value else None
+
+        ranges = []
+        begin = 0
+        while begin < n:
+            end = int(np.searchsorted(prefix, prefix[begin] + limit, side="right")) - 1
+            end = min(max(end, begin + 1), n)
+
+            # pull the cut back to the last sentence end inside the chunk, if there is one
+            if sentence_ends is not None and end < n:
+                pos = int(np.searchsorted(sentence_ends, end, side="left")) - 1
+                if pos >= 0 and sentence_ends[pos] >= begin:
+                    end = int(sentence_ends[pos]) + 1
+
+            ranges.append((begin, end))
+            if end >= n:
+                break
+
+            next_begin = end
+            if self.overlap_seconds > 0:
+                overlap = self.overlap_seconds
+                if self.strategy == ChunkingStrategyEnum.TOKENS.value:
+                    # token chunks have no fixed duration, keep the overlap under half of this chunk
+                    overlap = min(overlap, (ends[end - 1] - starts[begin]) / 2)
+                next_begin = int(np.searchsorted(starts, ends[end - 1] - overlap, side="left"))
+                next_begin = min(max(next_begin, begin + 1), end)
+            begin = next_begin
+
+        return ranges
+
+
+    def chunk(self, snippets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Chunk serialized snippets into [{'text','start','end'}].
+        start is the start of the first snippet and end the end of the last one, both exact.
+        """
+        starts, durations, tokens, texts = self.snippets_to_arrays(snippets)
+        chunks = []
+        for begin, end in self.split(starts, durations, tokens, texts):
+            chunks.append({
+                "text": " ".join(texts[begin:end]),
+                "start": float(starts[begin]),
+                "end": float(starts[end - 1] + durations[end - 1]),
+            })
+        return chunks
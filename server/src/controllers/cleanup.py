@@ -0,0 +1,72 @@
+import asyncio
+import traceback
+
+from ..models.db_models import VideoModel
+from ..stores import VectorDBInterface, BM25Store, RetrievalCache, SemanticAnswerCache
+
+
+class VectorCleanupController:
+    """
+    Removes the vectors of deleted videos in the background and reconciles the vector db with Postgres.
+    Cleanups are best effort: one lost to a restart leaves orphans that reconcile() purges later.
+    """
+    def __init__(self, db_client, vector_db: VectorDBInterface, max_concurrency: int = 2, max_retries: int = 3,
+                 lexical_index: BM25Store = None, retrieval_cache: RetrievalCache = None,
+                 answer_cache: SemanticAnswerCache = None):
+        self.db_client = db_client
+        self.vector_db = vector_db
+        self.lexical_index = lexical_index
+        self.retrieval_cache = retrieval_cache
+        self.answer_cache = answer_cache
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.tasks: set[asyncio.Task] = set()
+
+
+    def schedule(self, video_id: int) -> asyncio.Task:
+        """Start deleting the video vectors without blocking the caller."""
+        task = asyncio.create_task(self.cleanup_video(video_id=video_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+
+    async def cleanup_video(self, video_id: int) -> int:
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.invalidate_video(video_id)
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_video(video_id)
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if self.lexical_index is not None:
+                        await self.lexical_index.delete(video_id=str(video_id))
+                    return await self.vector_db.delete(video_id=str(video_id))
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        print(f"Giving up on vector cleanup of video {video_id}: {e}")
+                        print(f"Full traceback: {traceback.format_exc()}")
+                        return 0
+                    print(f"Vector cleanup of video {video_id} failed ({e}), retrying")
+                    await asyncio.sleep(2 ** attempt)
+
+
+    async def reconcile(self, dry_run: bool = False) -> dict:
+        """Find videos that have vectors but no Postgres row and purge their vectors."""
+        video_model = VideoModel(self.db_client)
+        known_ids = {str(video_id) for video_id in await video_model.get_all_video_ids()}
+        indexed_ids = await self.vector_db.list_video_ids()
+        orphan_ids = sorted(indexed_ids - known_ids)
+        print(f"Found {len(orphan_ids)} orphaned videos in the vector db out of {len(indexed_ids)}")
+
+        deleted = 0
+        if not dry_run:
+            for video_id in orphan_ids:
+                deleted += await self.cleanup_video(video_id=video_id)
+        return {"orphan_video_ids": orphan_ids, "deleted_records": deleted, "dry_run": dry_run}
+
+
+    async def wait(self):
+        """Wait for the scheduled cleanups, used on shutdown."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import traceback
+from datetime import datetime
+
+from .nlp import NLPController
+from ..models.db_models import VideoModel, IngestionJobModel, TranscriptChunkModel
+from ..models.db_models.ingestion_job import STAGE_TIMESTAMP_COLUMNS
+from ..models.enums import VideoStatusEnum, IngestionStageEnum
+from ..stores import VectorDBInterface, GenerationInterface, BM25Store, RetrievalCache, SemanticAnswerCache
+from ..utils.settings import get_settings
+
+
+class IngestionWorkerPool:
+    """
+    Bounded pool of asyncio workers that run the video ingestion pipeline from the persisted job table.
+    Every stage writes a checkpoint, so a job picked up again after a restart continues
+    from the last finished stage instead of redoing the summary or the upsert.
+    """
+    def __init__(self, db_client, vector_db: VectorDBInterface, generation_model: GenerationInterface, lexical_index: BM25Store = None,
+                 retrieval_cache: RetrievalCache = None, answer_cache: SemanticAnswerCache = None):
+        self.db_client = db_client
+        self.vector_db = vector_db
+        self.lexical_index = lexical_index
+        self.retrieval_cache = retrieval_cache
+        self.answer_cache = answer_cache
+        self.generation_model = generation_model
+        self.job_model = IngestionJobModel(db_client)
+        self.video_model = VideoModel(db_client)
+        self.chunk_model = TranscriptChunkModel(db_client)
+        self.nlp_controller = NLPController()
+
+        self.num_workers = get_settings().INGESTION_WORKERS
+        self.lease_seconds = get_settings().INGESTION_LEASE_SECONDS
+        self.max_attempts = get_settings().INGESTION_MAX_ATTEMPTS
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pending_job_ids: set[int] = set()
+        self.workers: list[asyncio.Task] = []
+        self.recovery_task: asyncio.Task | None = None
+        # indexing progress of running jobs by video id, reported by the vector db
+        self.index_progress: dict[int, dict] = {}
+
+
+    @staticmethod
+    def make_ingest_key(youtube_id: str, language: str, chunking_config: dict) -> str:
+        """Stable key of an ingestion, two requests with the same key share one summary and index."""
+        payload = json.dumps(
+            {"youtube_id": youtube_id, "language": language, "chunking": chunking_config},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+    async def start(self):
+        self.workers = [
+            asyncio.create_task(self._worker(worker_id=i))
+            for i in range(self.num_workers)
+        ]
+        self.recovery_task = asyncio.create_task(self._recovery_loop())
+        print(f"Ingestion pool started with {self.num_workers} workers")
+
+
+    async def stop(self):
+        tasks = self.workers + ([self.recovery_task] if self.recovery_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self.recovery_task = None
+        print("Ingestion pool stopped")
+
+
+    async def submit(self, job_id: int):
+        """Queue a job, jobs already waiting in the queue are not queued twice."""
+        if job_id in self.pending_job_ids:
+            return
+        self.pending_job_ids.add(job_id)
+        await self.queue.put(job_id)
+
+
+    async def _recovery_loop(self):
+        """Requeue unfinished jobs on startup and whenever a worker lease expires."""
+        interval = max(self.lease_seconds // 2, 1)
+        while True:
+            try:
+                job_ids = await self.job_model.get_resumable_job_ids()
+                for job_id in job_ids:
+                    await self.submit(job_id)
+                if job_ids:
+                    print(f"Requeued {len(job_ids)} unfinished ingestion jobs")
+            except Exception as e:
+                print(f"Error recovering ingestion jobs: {e}")
+            await asyncio.sleep(interval)
+
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self.queue.get()
+            self.pending_job_ids.discard(job_id)
+            try:
+                await self._run_job(job_id=job_id)
+            except Exception as e:
+                print(f"Worker {worker_id} crashed on ingestion job {job_id}: {e}")
+                print(f"Full traceback: {traceback.format_exc()}")
+            finally:
+                self.queue.task_done()
+
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(max(self.lease_seconds // 3, 1))
+            try:
+                await self.job_model.renew_lease(job_id=job_id, lease_seconds=self.lease_seconds)
+            except Exception as e:
+                print(f"Failed to renew lease for ingestion job {job_id}: {e}")
+
+
+    async def _fail_job(self, job, error: str):
+        print(f"Ingestion job {job.id} failed for video ID {job.video_id}: {error}")
+        try:
+            await self.job_model.mark_failed(job_id=job.id, error=error)
+            await self.video_model.update_video_status(video_id=job.video_id, new_status=VideoStatusEnum.FAILED.value)
+            print(f"Updated video status to FAILED for video ID: {job.video_id}")
+        except Exception as status_error:
+            print(f"Failed to update video status: {status_error}")
+
+
+    async def _run_job(self, job_id: int):
+        if not await self.job_model.claim_job(job_id=job_id, lease_seconds=self.lease_seconds):
+            print(f"Ingestion job {job_id} is finished or held by another worker, skipping")
+            return
+
+        job = await self.job_model.get_job_by_id(job_id=job_id)
+        if not job:
+            return
+
+        if job.attempts > self.max_attempts:
+            await self._fail_job(job, f"gave up after {job.attempts - 1} attempts")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id=job.id))
+        try:
+            await self._run_stages(job)
+        except asyncio.CancelledError:
+            # shutdown, keep the checkpoints and let the next start resume the job
+            await asyncio.shield(self.job_model.release_job(job_id=job.id))
+            raise
+        except asyncio.TimeoutError:
+            error = f"stage timed out after reaching '{IngestionJobModel.reported_stage(job)}'"
+            if job.attempts < self.max_attempts:
+                # a slow provider is usually transient, the next attempt resumes from the checkpoints
+                print(f"Ingestion job {job.id} attempt {job.attempts}/{self.max_attempts} failed: {error}, retrying")
+                await self.job_model.mark_retry(job_id=job.id, error=error)
+            else:
+                await self._fail_job(job, f"{error} on attempt {job.attempts}/{self.max_attempts}")
+        except Exception as e:
+            print(f"Full traceback: {traceback.format_exc()}")
+            await self._fail_job(job, str(e))
+        finally:
+            heartbeat.cancel()
+
+
+    def _is_done(self, job, stage: str) -> bool:
+        """A stage is done once its checkpoint timestamp is set, branches finish in any order."""
+        return getattr(job, STAGE_TIMESTAMP_COLUMNS[stage]) is not None
+
+
+    async def _checkpoint(self, job, stage: str, **payload):
+        await self.job_model.mark_stage(job_id=job.id, stage=stage, **payload)
+        job.stage = stage
+        setattr(job, STAGE_TIMESTAMP_COLUMNS[stage], datetime.now())
+        for key, value in payload.items():
+            setattr(job, key, value)
+
+
+    async def _summary_branch(self, job, chunks: list):
+        # generate video summary using the generation model
+        if not self._is_done(job, IngestionStageEnum.SUMMARIZED.value):
+            video_summary = await asyncio.wait_for(
+                self.generation_model.generate_video_summary(
+                    chunks=[chunk["text"] for chunk in chunks],
+                    video_title=job.video_title
+                ),
+                timeout=300  # 5 minute timeout
+            )
+            await self._checkpoint(job, IngestionStageEnum.SUMMARIZED.value, summary=video_summary)
+            print(f"Summary branch: Generated video summary (length: {len(video_summary)} chars)")
+
+        # save the summary on the video row
+        if not self._is_done(job, IngestionStageEnum.SUMMARY_SAVED.value):
+            await self.video_model.add_video_summary(video_id=job.video_id, summary=job.summary)
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate_video(job.video_id)
+            await self._checkpoint(job, IngestionStageEnum.SUMMARY_SAVED.value)
+            print(f"Summary branch completed: Video summary updated in database for video ID: {job.video_id}")
+
+
+    async def _index_branch(self, job, chunks: list):
+        # create embeddings and save to vector db
+        if not self._is_done(job, IngestionStageEnum.INDEXED.value):
+            def on_progress(indexed: int, total: int | None):
+                self.index_progress[job.video_id] = {"indexed_chunks": indexed, "total_chunks": total}
+
+            # the lexical index is local and cheap, build it first so it is complete whenever the vectors are
+            if self.lexical_index is not None:
+                await self.lexical_index.index(embedding_ready_data=chunks, video_id=job.video_id)
+            try:
+                await asyncio.wait_for(
+                    self.vector_db.index(embedding_ready_data=chunks, video_id=job.video_id, on_progress=on_progress),
+                    timeout=600  # 10 minute timeout for embedding
+                )
+            finally:
+                self.index_progress.pop(job.video_id, None)
+            if self.retrieval_cache is not None:
+                self.retrieval_cache.invalidate_video(job.video_id)
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate_video(job.video_id)
+            await self._checkpoint(job, IngestionStageEnum.INDEXED.value)
+            print(f"Index branch completed: Transcript chunks embedded and saved to vector database for video ID: {job.video_id}")
+
+
+    async def _run_branches(self, *branches):
+        """Run independent branches concurrently, the first failure cancels the others and is raised."""
+        tasks = [asyncio.create_task(branch) for branch in branches]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in tasks:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+
+    async def _run_stages(self, job):
+        """
+        chunk the transcript, then as two concurrent branches:
+          summary: generate the video summary -> save it on the video
+          index:   create embeddings and save to vector db
+        the video is marked ready only when both branches succeed
+        """
+        print(f"🚀 Running ingestion job {job.id} for video ID: {job.video_id} from stage '{IngestionJobModel.reported_stage(job)}'")
+
+        # step1: preprocess the transcript to generate chunks
+        # the job keeps the config it was keyed with, so a resumed job chunks the same way
+        if not self._is_done(job, IngestionStageEnum.CHUNKED.value):
+            chunks = self.nlp_controller.prepare_youtube_transcript_for_embedding(
+                transcript=json.loads(job.transcript),
+                chunking_config=json.loads(job.chunking_config)
+            )
+            # rows for time range lookups, written before the checkpoint so a resumed job never misses them
+            await self.chunk_model.replace_video_chunks(video_id=job.video_id, chunks=chunks)
+            await self._checkpoint(job, IngestionStageEnum.CHUNKED.value, chunks=chunks)
+            print(f"Step 1 completed: Processed transcript into {len(chunks)} chunks for video ID: {job.video_id}")
+        else:
+            chunks = json.loads(job.chunks)
+
+        if not chunks:
+            raise ValueError("transcript produced no chunks")
+
+        # step2: summary and indexing do not depend on each other
+        await self._run_branches(
+            self._summary_branch(job, chunks),
+            self._index_branch(job, chunks),
+        )
+
+        # step3: join, update video status to ready
+        await self.video_model.update_video_status(video_id=job.video_id, new_status=VideoStatusEnum.READY.value)
+        await self._checkpoint(job, IngestionStageEnum.READY.value)
+        await self.job_model.release_job(job_id=job.id)
+        print(f"Video processing completed successfully for video ID: {job.video_id}")
@@ -6,98 +6,76 @@
 
 from typing import List, Dict, Any
 from youtube_transcript_api import FetchedTranscript
+from ..utils.settings import get_settings
+from ..models.enums import ChunkingStrategyEnum
+from .chunking import TranscriptChunker
 
 class NLPController:
     def __init__(self):
         pass
 
-    def _preprocess_youtube_transcript(self, transcript: FetchedTranscript) -> List[Dict[str, Any]]:
+    def get_chunking_config(self) -> Dict[str, Any]:
         """
-        Preprocess the YouTube transcript for NLP tasks.
-        Splits the transcript into smaller chunks with metadata.
-        
-        Args:
-            transcript (FetchedTranscript): The transcript object fetched from YouTube.
-            it is a list of FetchedTranscriptSnippet objects with attributes 'text', 'start', and 'duration'.
+        Chunking parameters from settings, part of the ingestion key so a config change produces new chunks.
+        """
+        return {
+            "strategy": get_settings().CHUNK_STRATEGY,
+            "chunk_duration": int(get_settings().CHUNK_DURATION * 60),
+            "token_budget": get_settings().CHUNK_TOKEN_BUDGET,
+            "overlap_seconds": get_settings().CHUNK_OVERLAP_SECONDS,
+        }
 
-        Returns:
-            List[Dict[str, Any]]: A list of dictionaries containing text chunks and their metadata.
+
+    def serialize_youtube_transcript(self, transcript: FetchedTranscript | List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        try:
-            processed_transcript = []
-            for snippet in transcript.snippets:
-                chunk = {
-                    "text": snippet.text,
-                    "start": snippet.start,
-                    "duration": snippet.duration,
-                    "end": snippet.start + snippet.duration
-                }
-                processed_transcript.append(chunk)
-            return processed_transcript
-        except Exception as e:
-            print(f"Error preprocessing transcript: {e}")
-            return []
-        
+        Convert a FetchedTranscript into plain json serializable snippets [{'text','start','duration'}].
+        Already serialized snippets are returned as they are.
+        """
+        if isinstance(transcript, list):
+            return transcript
+        return [
+            {"text": snippet.text, "start": snippet.start, "duration": snippet.duration}
+            for snippet in transcript.snippets
+        ]
+
 
-    def _chunk_text(self, processed_transcript: List[Dict[str, Any]], chunk_duration: int) -> List[str]:
+    def _chunk_text(self, snippets: List[Dict[str, Any]], chunking_config: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Chunk the processed transcript into smaller segments based on chunk_duration.
+        Chunk the serialized transcript snippets with the configured strategy.
 
         Args:
-            processed_transcript (List[Dict[str, Any]]): The preprocessed transcript with metadata.
-            chunk_duration (int): The duration of each chunk in seconds.
+            snippets (List[Dict[str, Any]]): The transcript snippets [{'text','start','duration'}].
+            chunking_config (Dict[str, Any]): The config from get_chunking_config.
 
         Returns:
-            List[str]: A list of text chunks.
+            List[Dict[str, Any]]: A list of chunks [{'text','start','end'}].
         """
-        chunks = []
-        current_chunk = []
-        current_duration = 0.0
-
-        for snippet in processed_transcript:
-            # If adding this snippet exceeds the chunk_duration, start a new chunk
-            if current_duration + snippet["duration"] > chunk_duration and current_chunk:
-                # Join texts in the current chunk and add to chunks
-                current_chunk_text = " ".join([s["text"] for s in current_chunk])
-                chunks.append({
-                    "text": current_chunk_text,
-                    "start": current_chunk[0]["start"],
-                    "end": current_chunk[-1]["end"],
-                })
-                current_chunk = []
-                current_duration = 0.0
-
-            current_chunk.append(snippet)
-            current_duration += snippet["duration"]
-
-        # Add the last chunk if any
-        if current_chunk:
-            current_chunk_text = " ".join([s["text"] for s in current_chunk])
-            chunks.append({
-                "text": current_chunk_text,
-                "start": current_chunk[0]["start"],
-                "end": current_chunk[-1]["end"],
-            })
-
-        return chunks
+        chunker = TranscriptChunker(
+            strategy=chunking_config.get("strategy", ChunkingStrategyEnum.DURATION.value),
+            chunk_duration=chunking_config["chunk_duration"],
+            token_budget=chunking_config.get("token_budget", get_settings().CHUNK_TOKEN_BUDGET),
+            overlap_seconds=chunking_config.get("overlap_seconds", 0.0),
+        )
+        return chunker.chunk(snippets)
     
 
-    def prepare_youtube_transcript_for_embedding(self, transcript: FetchedTranscript,chunk_duration:int) -> List[Dict[str, Any]]:
+    def prepare_youtube_transcript_for_embedding(self, transcript: FetchedTranscript | List[Dict[str, Any]],chunking_config:Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Prepare the text chunks and their metadata for embedding generation.
 
         Args:
-            chunks (List[Dict[str, Any]]): The list of text chunks with metadata.
+            transcript (FetchedTranscript | List[Dict[str, Any]]): The transcript or its serialized snippets.
+            chunking_config (Dict[str, Any]): The config from get_chunking_config.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries ready for embedding generation.
         """
 
-        # Preprocess the transcript
-        processed_transcript = self._preprocess_youtube_transcript(transcript=transcript)
-        print(f"len of processed transcript: {len(processed_transcript)}")
+        # Serialize the transcript
+        snippets = self.serialize_youtube_transcript(transcript=transcript)
+        print(f"len of processed transcript: {len(snippets)}")
         # Chunk the text into smaller segments
-        chunks = self._chunk_text(processed_transcript=processed_transcript, chunk_duration=chunk_duration)
+        chunks = self._chunk_text(snippets=snippets, chunking_config=chunking_config)
         print(f"len of chunks: {len(chunks)}")
         embedding_ready_data=[
 
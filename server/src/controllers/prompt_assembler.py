@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import hashlib
+from ..stores import CHAT_SYSTEM_PROMPT, CHAT_VIDEO_CONTEXT_PROMPT, CHAT_MEMORY_PROMPT, CHAT_USER_PROMPT
+
+
+class PromptAssembler:
+    """
+    Builds the chat completion messages of an answer, ordered from the most stable part to the least stable:
+      1. system: instructions (same for every chat) + video summary (same for every chat of the video)
+      2. system: rolling summary of the chat (changes every few turns), only when there is one
+      3. the recent messages of the chat as real user/assistant turns
+      4. user: the current question
+    so consecutive requests share the longest possible prefix for provider side prompt caching.
+    The formatted system message of every video is kept in an LRU, keyed on the video and its summary.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.prefixes: OrderedDict[tuple, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def system_prompt(self, video_id, video_summary: str) -> str:
+        """The per-video system message, formatted once and reused until the summary changes."""
+        key = (str(video_id), hashlib.sha256((video_summary or "").encode("utf-8")).hexdigest())
+        prompt = self.prefixes.get(key)
+        if prompt is not None:
+            self.hits += 1
+            self.prefixes.move_to_end(key)
+            return prompt
+
+        self.misses += 1
+        prompt = CHAT_SYSTEM_PROMPT + CHAT_VIDEO_CONTEXT_PROMPT.format(video_summary=video_summary)
+        if self.max_entries > 0:
+            self.prefixes[key] = prompt
+            while len(self.prefixes) > self.max_entries:
+                self.prefixes.popitem(last=False)
+        return prompt
+
+
+    def build(self, video_id, video_summary: str, user_query: str, history: list[dict], chat_summary: str = '') -> list[dict]:
+        """Messages for the first model call, history holds the recent {'role','content'} messages of the chat."""
+        messages = [{"role": "system", "content": self.system_prompt(video_id, video_summary)}]
+        if chat_summary:
+            messages.append({"role": "system", "content": CHAT_MEMORY_PROMPT.format(chat_summary=chat_summary)})
+        # the current question is saved before the answer is generated, it is sent once as the last turn
+        turns = list(history)
+        if turns and turns[-1]["role"] == "user" and turns[-1]["content"] == user_query:
+            turns = turns[:-1]
+        messages.extend({"role": msg["role"], "content": msg["content"]} for msg in turns)
+        messages.append({"role": "user", "content": CHAT_USER_PROMPT.format(user_query=user_query)})
+        return messages
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.prefixes),
+        }
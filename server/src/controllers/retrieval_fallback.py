@@ -0,0 +1,30 @@
+from ..models.db_models import TranscriptChunkModel
+from ..stores import BM25Store
+
+
+class LocalRetrievalFallback:
+    """
+    Retrieval without the vector db, used while it is slow or down:
+    the video's BM25 index first, then a Postgres full text search over its stored transcript chunks.
+    Hits use the vector db ids and texts so they mix with dense hits downstream.
+    """
+    def __init__(self, db_client, lexical_index: BM25Store = None):
+        self.chunk_model = TranscriptChunkModel(db_client)
+        self.lexical_index = lexical_index
+
+
+    async def search(self, user_query: str, top_k: int, video_id: str) -> list[dict]:
+        if self.lexical_index is not None:
+            results = await self.lexical_index.search(user_query=user_query, top_k=top_k, video_id=video_id)
+            if results["result"]["hits"]:
+                return results["result"]["hits"]
+
+        chunks = await self.chunk_model.search_chunks_by_text(video_id=int(video_id), query=user_query, limit=top_k)
+        return [
+            {
+                "_id": f"{video_id}_chunk_{chunk.chunk_index}",
+                "_score": float(chunk.rank),
+                "fields": {"text": f"From {chunk.start_time} to {chunk.end_time}: {chunk.text}", "source": str(video_id)},
+            }
+            for chunk in chunks
+        ]
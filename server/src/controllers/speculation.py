@@ -0,0 +1,55 @@
+import re
+import time
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class SpeculativeRetrieval:
+    """
+    Shared settings and counters of speculative retrieval: the agent starts a search with the raw user question
+    while the first model call is running, and reuses it when the model asks for a close enough query.
+      hit:    a get_relevant_chunks call matched and awaited the speculative search
+      miss:   the model called the tool with a different query, the speculative search was cancelled
+      unused: the model answered without searching, the speculative search was cancelled
+    """
+    def __init__(self, match_threshold: float, top_k: int = 3):
+        self.match_threshold = match_threshold
+        self.top_k = top_k
+
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.unused = 0
+        self.latency_saved = 0.0
+
+
+    @staticmethod
+    def similarity(query: str, other: str) -> float:
+        """Jaccard similarity of the word sets of two queries."""
+        words = set(WORD_PATTERN.findall(query.lower()))
+        other_words = set(WORD_PATTERN.findall(other.lower()))
+        if not words or not other_words:
+            return 0.0
+        return len(words & other_words) / len(words | other_words)
+
+
+    def matches(self, speculative_query: str, query: str, top_k: int) -> bool:
+        return top_k <= self.top_k and self.similarity(speculative_query, query) >= self.match_threshold
+
+
+    def record_hit(self, started_at: float, finished_at: float | None):
+        """The search ran for the time between its start and the tool call (or its end) before anyone needed it."""
+        self.hits += 1
+        self.latency_saved += min(time.perf_counter(), finished_at or time.perf_counter()) - started_at
+
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "unused": self.unused,
+            "hit_rate": round(self.hits / self.started, 4) if self.started else 0.0,
+            "waste_rate": round((self.misses + self.unused) / self.started, 4) if self.started else 0.0,
+            "latency_saved_ms": round(self.latency_saved * 1000, 1),
+        }
@@ -1,5 +1,7 @@
 from urllib.parse import urlparse, parse_qs
-import requests
+import asyncio
+from concurrent.futures import Executor
+import httpx
 from ..utils.settings import get_settings
 from typing import List, Optional
 from youtube_transcript_api import YouTubeTranscriptApi
@@ -11,9 +13,14 @@ from youtube_transcript_api._errors import (
 
 
 class VideoController:
-    def __init__(self):
+    def __init__(self, http_client: httpx.AsyncClient = None, transcript_executor: Executor = None):
+        """
+        http_client: shared pooled client for the YouTube Data API
+        transcript_executor: bounded executor the blocking transcript api runs on
+        """
         self.youtube_api= YouTubeTranscriptApi()
-        pass
+        self.http_client = http_client
+        self.transcript_executor = transcript_executor
 
     def _extract_youtube_id(self,url: str) -> str | None:
         """Extract the video ID from a YouTube URL."""
@@ -34,18 +41,29 @@ class VideoController:
             return parsed.path.split("/")[2]
 
         return None
+
+
+    def get_youtube_id(self, youtube_link: str) -> str | None:
+        """Public entry point for routes: the YouTube video id of a link, None when the link is not a YouTube video."""
+        return self._extract_youtube_id(youtube_link)
     
 
 
     
-    def _fetch_youtube_title(self,video_id: str) -> str | None:
+    async def _fetch_youtube_title(self,video_id: str) -> str | None:
         """Fetch the video title from YouTube Data API v3."""
-        url = (
-            "https://www.googleapis.com/youtube/v3/videos"
-            f"?part=snippet&id={video_id}&key={get_settings().YOUTUBE_API_KEY}"
-        )
-        resp = requests.get(url)
-        data = resp.json()
+        url = "https://www.googleapis.com/youtube/v3/videos"
+        params = {"part": "snippet", "id": video_id, "key": get_settings().YOUTUBE_API_KEY}
+        try:
+            if self.http_client is not None:
+                resp = await self.http_client.get(url, params=params)
+            else:
+                async with httpx.AsyncClient(timeout=get_settings().YOUTUBE_API_TIMEOUT) as client:
+                    resp = await client.get(url, params=params)
+            data = resp.json()
+        except httpx.HTTPError as e:
+            print(f"Error fetching youtube title: {e}")
+            return None
 
         items = data.get("items", [])
         if items:
@@ -98,7 +116,8 @@ class VideoController:
         """
         Fetch transcript for the first matching language code 
         that starts with the given prefix ('en' or 'ar').
-        Returns a list of dicts [{'text','start','duration'}] or None.
+        Blocking, use _get_transcript_async from the event loop.
+        Returns (is_available, FetchedTranscript | None).
         """
         try:
             is_available,transcript=None,None
@@ -117,20 +136,35 @@ class VideoController:
                 
         except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable) as e:
             print(f"Transcript error: {e}")
-            return None
+            return False, None
+
+
+    async def _get_transcript_async(self, video_id: str, target_language: str = "en"):
+        """Run the blocking transcript fetch on the bounded executor so it never stalls the event loop."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.transcript_executor, self._get_transcript, video_id, target_language),
+                timeout=get_settings().TRANSCRIPT_FETCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"Transcript fetch timed out for video {video_id}")
+            return False, None
         
     
-    def get_video_info(self, youtube_link: str):
+    async def get_video_info(self, youtube_link: str, target_language: str = "en"):
         # Logic to extract video info from YouTube link
         video_id = self._extract_youtube_id(youtube_link)
         if not video_id:
             return None
         
-        video_title = self._fetch_youtube_title(video_id)
+        # title and transcript come from different services, fetch them concurrently
+        video_title, (is_available, transcript) = await asyncio.gather(
+            self._fetch_youtube_title(video_id),
+            self._get_transcript_async(video_id, target_language=target_language),
+        )
         if not video_title:
             return None
-        
-        is_available, transcript = self._get_transcript(video_id, target_language="en")
 
         
         return {
@@ -138,4 +172,4 @@ class VideoController:
             "title": video_title,
             "transcript_available": is_available,
             "transcript": transcript
-        }
\ No newline at end of file
+        }
@@ -1,3 +1,6 @@
 from .chat import ChatModel
 from .message import MessageModel
-from .video import VideoModel
\ No newline at end of file
+from .video import VideoModel
+from .ingestion_job import IngestionJobModel
+from .transcript_chunk import TranscriptChunkModel
+from .chat_memory import ChatMemoryModel
@@ -0,0 +1,46 @@
+from .base_model import BaseModel
+from ..db_scheme import chat_memory_scheme
+from sqlalchemy import text as sql_text
+from ..enums import TablesEnum
+
+
+class ChatMemoryModel(BaseModel):
+    def __init__(self, db_client):
+        super().__init__(db_client)
+        self.table_name = TablesEnum.CHAT_MEMORIES.value
+
+
+    async def get_memory(self, chat_id: int) -> chat_memory_scheme | None:
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT * FROM {self.table_name} WHERE chat_id = :chat_id"),
+                {"chat_id": chat_id}
+            )
+            row = result.mappings().fetchone()
+        return chat_memory_scheme(**row) if row else None
+
+
+    async def save_memory(self, chat_id: int, summary: str, last_message_id: int) -> bool:
+        """Upsert the rolling summary, a summary never replaces one that already covers later messages.
+        Returns False when the stored summary was newer."""
+        async with self.db_clint() as session:
+            async with session.begin():
+                result = await session.execute(
+                    sql_text(f"INSERT INTO {self.table_name} (chat_id, summary, last_message_id) "
+                             "VALUES (:chat_id, :summary, :last_message_id) "
+                             "ON CONFLICT (chat_id) DO UPDATE "
+                             "SET summary = EXCLUDED.summary, last_message_id = EXCLUDED.last_message_id, updated_at = CURRENT_TIMESTAMP "
+                             f"WHERE {self.table_name}.last_message_id < EXCLUDED.last_message_id"),
+                    {"chat_id": chat_id, "summary": summary, "last_message_id": last_message_id}
+                )
+        return result.rowcount > 0
+
+
+    async def delete_memory(self, chat_id: int):
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"DELETE FROM {self.table_name} WHERE chat_id = :chat_id"),
+                    {"chat_id": chat_id}
+                )
+        return True
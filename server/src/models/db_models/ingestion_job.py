@@ -0,0 +1,178 @@
+import json
+from .base_model import BaseModel
+from ..db_scheme import ingestion_job_scheme
+from sqlalchemy import text as sql_text
+from ..enums import TablesEnum, IngestionStageEnum, VideoStatusEnum
+
+# checkpoint column written when a job reaches each stage
+STAGE_TIMESTAMP_COLUMNS = {
+    IngestionStageEnum.CHUNKED.value: "chunked_at",
+    IngestionStageEnum.SUMMARIZED.value: "summarized_at",
+    IngestionStageEnum.SUMMARY_SAVED.value: "summary_saved_at",
+    IngestionStageEnum.INDEXED.value: "indexed_at",
+    IngestionStageEnum.READY.value: "completed_at",
+}
+
+
+class IngestionJobModel(BaseModel):
+    def __init__(self, db_client):
+        super().__init__(db_client)
+        self.table_name = TablesEnum.INGESTION_JOBS.value
+
+
+    @staticmethod
+    def reported_stage(job: ingestion_job_scheme) -> str:
+        """
+        Furthest stage the job reached, derived from its checkpoint timestamps.
+        The summary and index branches write the stage column concurrently, so it can name an earlier
+        stage than one already finished; the timestamps are only ever set, so this never moves backwards.
+        """
+        if job.stage == IngestionStageEnum.FAILED.value:
+            return job.stage
+        reached = IngestionStageEnum.PENDING.value
+        for stage, column in STAGE_TIMESTAMP_COLUMNS.items():
+            if getattr(job, column) is not None:
+                reached = stage
+        return reached
+
+
+    async def add_job(self, job_data: ingestion_job_scheme) -> ingestion_job_scheme:
+        async with self.db_clint() as session:
+            async with session.begin():
+                session.add(job_data)
+            await session.commit()
+            await session.refresh(job_data)
+        return job_data
+
+
+    async def get_job_by_id(self, job_id: int) -> ingestion_job_scheme | None:
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT * FROM {self.table_name} WHERE id = :job_id"),
+                {"job_id": job_id}
+            )
+            row = result.mappings().fetchone()
+            if row:
+                return ingestion_job_scheme(**row)
+            return None
+
+
+    async def get_job_by_video_id(self, video_id: int) -> ingestion_job_scheme | None:
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT * FROM {self.table_name} WHERE video_id = :video_id"),
+                {"video_id": video_id}
+            )
+            row = result.mappings().fetchone()
+            if row:
+                return ingestion_job_scheme(**row)
+            return None
+
+
+    async def get_reusable_video_by_ingest_key(self, ingest_key: str):
+        """Latest video ingested with the same key that is ready or still processing."""
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT v.* FROM {self.table_name} j "
+                         f"JOIN {TablesEnum.VIDEOS.value} v ON v.id = j.video_id "
+                         "WHERE j.ingest_key = :ingest_key AND v.vector_status IN (:ready, :processing) "
+                         "ORDER BY (v.vector_status = :ready) DESC, v.created_at DESC LIMIT 1"),
+                {"ingest_key": ingest_key, "ready": VideoStatusEnum.READY.value, "processing": VideoStatusEnum.PROCESSING.value}
+            )
+            video = result.fetchone()
+            return video if video else None
+
+
+    async def get_resumable_job_ids(self) -> list[int]:
+        """Jobs that did not finish and are not held by a live worker."""
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT id FROM {self.table_name} "
+                         "WHERE stage NOT IN (:ready, :failed) "
+                         "AND (lease_expires_at IS NULL OR lease_expires_at < now()) "
+                         "ORDER BY created_at ASC"),
+                {"ready": IngestionStageEnum.READY.value, "failed": IngestionStageEnum.FAILED.value}
+            )
+            return [row[0] for row in result.fetchall()]
+
+
+    async def claim_job(self, job_id: int, lease_seconds: int) -> bool:
+        """Take the lease on a job, returns False if another worker holds it or it is finished."""
+        async with self.db_clint() as session:
+            async with session.begin():
+                result = await session.execute(
+                    sql_text(f"UPDATE {self.table_name} "
+                             "SET lease_expires_at = now() + make_interval(secs => :lease), "
+                             "attempts = attempts + 1, updated_at = now() "
+                             "WHERE id = :job_id AND stage NOT IN (:ready, :failed) "
+                             "AND (lease_expires_at IS NULL OR lease_expires_at < now())"),
+                    {"lease": float(lease_seconds), "job_id": job_id,
+                     "ready": IngestionStageEnum.READY.value, "failed": IngestionStageEnum.FAILED.value}
+                )
+                return result.rowcount > 0
+
+
+    async def renew_lease(self, job_id: int, lease_seconds: int) -> None:
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"UPDATE {self.table_name} "
+                             "SET lease_expires_at = now() + make_interval(secs => :lease) "
+                             "WHERE id = :job_id"),
+                    {"lease": float(lease_seconds), "job_id": job_id}
+                )
+
+
+    async def release_job(self, job_id: int) -> None:
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"UPDATE {self.table_name} SET lease_expires_at = NULL WHERE id = :job_id"),
+                    {"job_id": job_id}
+                )
+
+
+    async def mark_stage(self, job_id: int, stage: str, **payload) -> None:
+        """Record a finished stage checkpoint with its optional payload (chunks, summary)."""
+        assignments = ["stage = :stage", "updated_at = now()"]
+        params = {"stage": stage, "job_id": job_id}
+
+        timestamp_column = STAGE_TIMESTAMP_COLUMNS.get(stage)
+        if timestamp_column:
+            assignments.append(f"{timestamp_column} = now()")
+        if "chunks" in payload:
+            assignments.append("chunks = :chunks")
+            params["chunks"] = json.dumps(payload["chunks"])
+        if "summary" in payload:
+            assignments.append("summary = :summary")
+            params["summary"] = payload["summary"]
+
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"UPDATE {self.table_name} SET {', '.join(assignments)} WHERE id = :job_id"),
+                    params
+                )
+
+
+    async def mark_retry(self, job_id: int, error: str) -> None:
+        """Keep the checkpoints and drop the lease of a failed attempt, the recovery loop picks the job up again."""
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"UPDATE {self.table_name} "
+                             "SET last_error = :error, lease_expires_at = NULL, updated_at = now() "
+                             "WHERE id = :job_id"),
+                    {"error": error, "job_id": job_id}
+                )
+
+
+    async def mark_failed(self, job_id: int, error: str) -> None:
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"UPDATE {self.table_name} "
+                             "SET stage = :stage, last_error = :error, lease_expires_at = NULL, updated_at = now() "
+                             "WHERE id = :job_id"),
+                    {"stage": IngestionStageEnum.FAILED.value, "error": error, "job_id": job_id}
+                )
@@ -32,6 +32,18 @@ class MessageModel(BaseModel):
         return [message_scheme(**row) for row in chats]
     
 
+    async def get_messages_after(self, chat_id: int, after_message_id: int = 0) -> list[message_scheme]:
+        """Messages of the chat newer than after_message_id, oldest first."""
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT * FROM {self.table_name} WHERE chat_id = :chat_id AND id > :after_message_id ORDER BY id ASC"),
+                {"chat_id": chat_id, "after_message_id": after_message_id}
+            )
+            messages = result.mappings().fetchall()
+
+        return [message_scheme(**row) for row in messages]
+    
+
     async def delete_messages_by_chat_id(self,chat_id:int):
         async with self.db_clint() as session:
             async with session.begin():
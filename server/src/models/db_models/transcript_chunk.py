@@ -0,0 +1,76 @@
+import hashlib
+import re
+from .base_model import BaseModel
+from ..db_scheme import transcript_chunk_scheme
+from sqlalchemy import text as sql_text
+from ..enums import TablesEnum
+
+# word tokens only, so user text never reaches to_tsquery operators
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class TranscriptChunkModel(BaseModel):
+    def __init__(self, db_client):
+        super().__init__(db_client)
+        self.table_name = TablesEnum.TRANSCRIPT_CHUNKS.value
+
+
+    async def replace_video_chunks(self, video_id: int, chunks: list[dict]) -> int:
+        """
+        Store the chunks [{'text','duration':{'start','end'}}] of a video in one transaction,
+        replacing any rows of a previous attempt so a resumed ingestion stays idempotent.
+        """
+        rows = [
+            {
+                "video_id": video_id,
+                "chunk_index": i,
+                "start_time": float(chunk["duration"]["start"]),
+                "end_time": float(chunk["duration"]["end"]),
+                "text": chunk["text"],
+                "text_hash": hashlib.sha256(chunk["text"].encode("utf-8")).hexdigest(),
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+        async with self.db_clint() as session:
+            async with session.begin():
+                await session.execute(
+                    sql_text(f"DELETE FROM {self.table_name} WHERE video_id = :video_id"),
+                    {"video_id": video_id}
+                )
+                if rows:
+                    await session.execute(
+                        sql_text(f"INSERT INTO {self.table_name} "
+                                 "(video_id, chunk_index, start_time, end_time, text, text_hash) "
+                                 "VALUES (:video_id, :chunk_index, :start_time, :end_time, :text, :text_hash)"),
+                        rows
+                    )
+        return len(rows)
+
+
+    async def get_chunks_by_time(self, video_id: int, start_seconds: float, end_seconds: float, limit: int = 10) -> list[transcript_chunk_scheme]:
+        """Chunks overlapping [start_seconds, end_seconds], in time order."""
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT * FROM {self.table_name} "
+                         "WHERE video_id = :video_id AND start_time <= :end_seconds AND end_time >= :start_seconds "
+                         "ORDER BY start_time ASC LIMIT :limit"),
+                {"video_id": video_id, "start_seconds": float(start_seconds), "end_seconds": float(end_seconds), "limit": limit}
+            )
+            return result.fetchall()
+
+
+
+    async def search_chunks_by_text(self, video_id: int, query: str, limit: int = 5) -> list:
+        """Postgres full text search over a video's chunks, any query term matches, best ts_rank first."""
+        terms = TOKEN_PATTERN.findall(query.lower())
+        if not terms:
+            return []
+        async with self.db_clint() as session:
+            result = await session.execute(
+                sql_text(f"SELECT *, ts_rank(to_tsvector('simple', text), to_tsquery('simple', :tsquery)) AS rank "
+                         f"FROM {self.table_name} "
+                         "WHERE video_id = :video_id AND to_tsvector('simple', text) @@ to_tsquery('simple', :tsquery) "
+                         "ORDER BY rank DESC LIMIT :limit"),
+                {"video_id": video_id, "tsquery": " | ".join(dict.fromkeys(terms)), "limit": limit}
+            )
+            return result.fetchall()
@@ -72,6 +72,11 @@ class VideoModel(BaseModel):
                 await session.commit()
                 return result.rowcount > 0
 
+    async def get_all_video_ids(self) -> list[int]:
+        async with self.db_clint() as session:
+            result = await session.execute(sql_text(f"SELECT id FROM {self.table_name}"))
+            return [row[0] for row in result.fetchall()]
+
     async def get_all_user_videos(self) -> list[video_scheme]:
         async with self.db_clint() as session:
             result = await session.execute(
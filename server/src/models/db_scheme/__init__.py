@@ -1,4 +1,7 @@
 from .chat import Chat as chat_scheme
 from .message import Message as message_scheme
 from .video import Video as video_scheme
+from .ingestion_job import IngestionJob as ingestion_job_scheme
+from .transcript_chunk import TranscriptChunk as transcript_chunk_scheme
+from .chat_memory import ChatMemory as chat_memory_scheme
 from .base_scheme import SQLAlchemyBase
\ No newline at end of file
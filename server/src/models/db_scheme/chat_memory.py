@@ -0,0 +1,13 @@
+from .base_scheme import SQLAlchemyBase
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, func
+from ..enums import TablesEnum
+
+
+class ChatMemory(SQLAlchemyBase):
+    __tablename__ = TablesEnum.CHAT_MEMORIES.value
+
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), primary_key=True)
+    # rolling summary of every message of the chat up to last_message_id
+    summary = Column(Text, nullable=False)
+    last_message_id = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
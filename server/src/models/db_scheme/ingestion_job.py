@@ -0,0 +1,44 @@
+from .base_scheme import SQLAlchemyBase
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, func
+from ..enums import TablesEnum, IngestionStageEnum
+
+
+class IngestionJob(SQLAlchemyBase):
+    __tablename__ = TablesEnum.INGESTION_JOBS.value
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), index=True, unique=True, nullable=False)
+    video_title = Column(String, nullable=False)
+
+    # hash of (youtube_id, language, chunking config) used to reuse already ingested videos
+    ingest_key = Column(String, nullable=False, index=True)
+    language = Column(String, nullable=False)
+    chunking_config = Column(Text, nullable=False)
+
+    # last checkpoint the pipeline reached
+    stage = Column(
+        String,
+        nullable=False,
+        index=True,
+        default=IngestionStageEnum.PENDING.value,
+        server_default=IngestionStageEnum.PENDING.value,
+    )
+
+    # json payloads kept so a restarted worker can resume without refetching or rechunking
+    transcript = Column(Text, nullable=False)  # [{'text','start','duration'}]
+    chunks = Column(Text, nullable=True)       # [{'text','duration':{'start','end'}}]
+    summary = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    # per stage checkpoints
+    chunked_at = Column(DateTime, nullable=True)
+    summarized_at = Column(DateTime, nullable=True)
+    summary_saved_at = Column(DateTime, nullable=True)
+    indexed_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,24 @@
+from .base_scheme import SQLAlchemyBase
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Text, func, Index, UniqueConstraint
+from ..enums import TablesEnum
+
+
+class TranscriptChunk(SQLAlchemyBase):
+    __tablename__ = TablesEnum.TRANSCRIPT_CHUNKS.value
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    # seconds from the start of the video
+    start_time = Column(Float, nullable=False)
+    end_time = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+    # sha256 of the text
+    text_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("video_id", "chunk_index", name="uq_transcript_chunks_video_chunk"),
+        # time range lookups: WHERE video_id = ? AND start_time <= ? ORDER BY start_time
+        Index("ix_transcript_chunks_video_start", "video_id", "start_time"),
+    )
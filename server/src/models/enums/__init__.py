@@ -1,2 +1,5 @@
 from .tables_emum import TablesEnum
-from .video_enum import VideoStatusEnum
\ No newline at end of file
+from .video_enum import VideoStatusEnum
+from .ingestion_enum import IngestionStageEnum
+from .chunking_enum import ChunkingStrategyEnum
+from .retrieval_enum import RetrievalModeEnum
\ No newline at end of file
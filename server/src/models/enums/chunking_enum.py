@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ChunkingStrategyEnum(str, Enum):
+    DURATION = "duration"
+    TOKENS = "tokens"
+    SENTENCE = "sentence"
\ No newline at end of file
@@ -0,0 +1,11 @@
+from enum import Enum
+
+class IngestionStageEnum(str, Enum):
+    PENDING = "pending"
+    CHUNKED = "chunked"
+    SUMMARIZED = "summarized"
+    SUMMARY_SAVED = "summary_saved"
+    INDEXED = "indexed"
+    READY = "ready"
+    FAILED = "failed"
+
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class RetrievalModeEnum(str, Enum):
+    DENSE = "dense"
+    HYBRID = "hybrid"
+    LEXICAL_FIRST = "lexical_first"
@@ -4,4 +4,7 @@ from enum import Enum
 class TablesEnum(str, Enum):
     CHATS= "chats"
     MESSAGES= "messages"
-    VIDEOS= "videos"
\ No newline at end of file
+    VIDEOS= "videos"
+    INGESTION_JOBS= "ingestion_jobs"
+    TRANSCRIPT_CHUNKS= "transcript_chunks"
+    CHAT_MEMORIES= "chat_memories"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 
 
@@ -8,3 +8,26 @@ router = APIRouter(prefix="/api/v1")
 @router.get("/health")
 async def health_check():
     return {"status": "ok", "message": "Server is running"}
+
+
+@router.get("/metrics")
+async def get_metrics(request: Request):
+    """
+    cache and performance counters of the running server
+    """
+    llm_cache = request.app.state.llm_cache
+    retrieval_cache = request.app.state.retrieval_cache
+    answer_cache = request.app.state.answer_cache
+    speculation = request.app.state.speculation
+    return {
+        "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+        "embedding": request.app.state.embedding.stats(),
+        "vector_db": request.app.state.vector_db.stats(),
+        "retrieval_cache": retrieval_cache.stats() if retrieval_cache is not None else None,
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "speculative_retrieval": speculation.stats() if speculation is not None else None,
+        "generation": request.app.state.generation_model.stats(),
+        "prompt_prefix": request.app.state.prompt_assembler.stats(),
+        "chat_memory": request.app.state.chat_memory.stats(),
+        "chat_stream": request.app.state.chat_latency.stats(),
+    }
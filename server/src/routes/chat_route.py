@@ -1,12 +1,15 @@
 from fastapi import APIRouter,Request
 from .routes_scheme import CreateNewChatRequest, SendMessageRequest, RoleMessage
 from ..models.db_scheme import message_scheme,chat_scheme
-from  ..controllers import AgMPentController
+from  ..controllers import AgMPentController, ChatMemoryController
 from ..models.enums.video_enum import VideoStatusEnum
 from ..models.db_models import VideoModel,ChatModel,MessageModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
+import time
 from ..stores import VectorDBInterface
 from ..stores import GenerationInterface
+from ..stores import BM25Store, RetrievalCache, SemanticAnswerCache
 
 router = APIRouter(tags=["chats"])
 
@@ -86,6 +89,10 @@ async def send_message_to_chat(request:Request,chat_id:int,message_request:SendM
     message_model=MessageModel(db_client)
     vector_db:VectorDBInterface= request.app.state.vector_db 
     generation:GenerationInterface= request.app.state.generation_model
+    lexical_index:BM25Store= request.app.state.lexical_index
+    retrieval_cache:RetrievalCache= request.app.state.retrieval_cache
+    answer_cache:SemanticAnswerCache= request.app.state.answer_cache
+    chat_memory:ChatMemoryController= request.app.state.chat_memory
     try:
         chat_data=await chat_model.get_chat_by_id(chat_id=chat_id)
         if not chat_data:
@@ -109,11 +116,10 @@ async def send_message_to_chat(request:Request,chat_id:int,message_request:SendM
         return {"error": f"Error saving message to database: {e}"}
     
     try:
-        # get chat history
-        history_messages=await message_model.get_chat_history(chat_id=chat_id)
-        history=[{"role":msg.role,"content":msg.content} for msg in history_messages[-10:]] 
-        agent_controller= AgMPentController(vector_db=vector_db,generation=generation,video_id=video_data.id)
-        assistant_response= await agent_controller.get_model_answer(user_query=message_request.message,history=history,summary=video_data.video_summary )
+        # get the rolling chat summary and the recent messages that fit the history budget
+        chat_summary,history=await chat_memory.build_history(chat_id=chat_id)
+        agent_controller= AgMPentController(vector_db=vector_db,generation=generation,video_id=video_data.id,lexical_index=lexical_index,retrieval_cache=retrieval_cache,answer_cache=answer_cache,db_client=db_client,speculation=request.app.state.speculation,prompt_assembler=request.app.state.prompt_assembler)
+        assistant_response= await agent_controller.get_model_answer(user_query=message_request.message,history=history,summary=video_data.video_summary,chat_summary=chat_summary)
     except Exception as e:
         return {"error": f"Error getting chat history from database: {e}"}
 
@@ -122,6 +128,7 @@ async def send_message_to_chat(request:Request,chat_id:int,message_request:SendM
         assistant_content = assistant_response.content if hasattr(assistant_response, 'content') else str(assistant_response)
         assistant_message_obj=message_scheme(chat_id=chat_id,role=RoleMessage.ASSISTANT.value,content=assistant_content)
         assistant_message_created_data=await message_model.add_message(message_data=assistant_message_obj,chat_id=chat_id)
+        chat_memory.schedule_compaction(chat_id=chat_id)
     except Exception as e:
         return {"error": f"Error saving assistant message to database: {e}"}
 
@@ -131,6 +138,73 @@ async def send_message_to_chat(request:Request,chat_id:int,message_request:SendM
 
 
 
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chats/{chat_id}/messages/stream")
+async def stream_message_to_chat(request:Request,chat_id:int,message_request:SendMessageRequest):
+    """
+    send message to chat and stream the response as server sent events:
+    tool_call / tool_result progress events, token events with the answer text as it is generated,
+    then done with the saved assistant message
+    """
+    started = time.perf_counter()
+    db_client = request.app.state.db_client
+    chat_model=ChatModel(db_client)
+    video_model=VideoModel(db_client)
+    message_model=MessageModel(db_client)
+    chat_latency = request.app.state.chat_latency
+    chat_memory:ChatMemoryController= request.app.state.chat_memory
+    try:
+        chat_data=await chat_model.get_chat_by_id(chat_id=chat_id)
+        if not chat_data:
+            return JSONResponse(content={"error": "Chat not found"},status_code=404)
+    except Exception as e:
+        return {"error": f"Error getting chat from database: {e}"}
+
+    try:
+        video_data=await video_model.get_video_by_id(video_id=chat_data.video_id)
+        if not video_data or video_data.vector_status != VideoStatusEnum.READY.value:
+            return JSONResponse(content={"error": "Associated video is not ready for chat"},status_code=400)
+    except Exception as e:
+        return {"error": f"Error getting associated video from database: {e}"}
+
+    try:
+        message_obj=message_scheme(chat_id=chat_id,role=RoleMessage.USER.value,content=message_request.message)
+        await message_model.add_message(message_data=message_obj,chat_id=chat_id)
+        chat_summary,history=await chat_memory.build_history(chat_id=chat_id)
+    except Exception as e:
+        return {"error": f"Error saving message to database: {e}"}
+
+    agent_controller= AgMPentController(vector_db=request.app.state.vector_db,generation=request.app.state.generation_model,video_id=video_data.id,
+                                        lexical_index=request.app.state.lexical_index,retrieval_cache=request.app.state.retrieval_cache,
+                                        answer_cache=request.app.state.answer_cache,db_client=db_client,
+                                        speculation=request.app.state.speculation,prompt_assembler=request.app.state.prompt_assembler)
+
+    async def event_stream():
+        first_token = True
+        try:
+            async for event, data in agent_controller.stream_model_answer(user_query=message_request.message,history=history,summary=video_data.video_summary,chat_summary=chat_summary):
+                if event == "token" and first_token:
+                    first_token = False
+                    chat_latency.record("time_to_first_token", (time.perf_counter() - started) * 1000)
+                if event == "done":
+                    # the assistant message is saved once the whole answer is known
+                    assistant_message_obj=message_scheme(chat_id=chat_id,role=RoleMessage.ASSISTANT.value,content=data["message"])
+                    await message_model.add_message(message_data=assistant_message_obj,chat_id=chat_id)
+                    chat_memory.schedule_compaction(chat_id=chat_id)
+                    chat_latency.record("total", (time.perf_counter() - started) * 1000)
+                yield _sse_event(event, data)
+        except Exception as e:
+            print(f"Error streaming answer for chat {chat_id}: {e}")
+            yield _sse_event("error", {"error": f"Error generating answer: {e}"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+
+
 @router.get("/chats/{chat_id}/history")
 async def get_chat_history(request:Request,chat_id:int):
     """
@@ -170,8 +244,9 @@ async def delete_chat_by_id(request:Request,chat_id:int):
             return JSONResponse(content={"error": "Chat not found"},status_code=404)
     except Exception as e:
         return {"error": f"Error getting chat from database: {e}"}
-    # delete all messages associated with the chat
+    # delete all messages and the rolling summary associated with the chat
     try:
+        await request.app.state.chat_memory.forget(chat_id=chat_id)
         await message_model.delete_messages_by_chat_id(chat_id=chat_id)
     except Exception as e:
         return {"error": f"Error deleting messages from database: {e}"}
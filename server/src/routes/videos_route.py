@@ -1,195 +1,55 @@
-from fastapi import APIRouter, Request, BackgroundTasks
+import json
+from fastapi import APIRouter, Request
 from src.routes.routes_scheme import CreateNewVideoRequest
-from src.models.db_scheme import video_scheme
-from src.controllers import NLPController, VideoController
+from src.models.db_scheme import video_scheme, ingestion_job_scheme
+from src.controllers import NLPController, VideoController, IngestionWorkerPool, VectorCleanupController
 from src.models.enums.video_enum import VideoStatusEnum
-from src.models.db_models import VideoModel
+from src.models.db_models import VideoModel, IngestionJobModel
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from src.utils.settings import get_settings
-from src.stores import VectorDBInterface
-from src.stores import GenerationInterface
+from src.utils.single_flight import SingleFlight
 
 
 router = APIRouter(tags=["videos"])
 
 
 
-async def process_video_task(fastapi_request:Request,video_id:str,youtube_video_id:str,video_title:str,is_transcript_availabe:bool=False,youtube_transcript:str=None):
-    """
-    background task to process the video
-    1. preprocess the transcript if available
-    2. generate video summary
-    3. create embeddings and save to vector db
-    4. create video entry in the database
-    """
-    import traceback
-    import asyncio
-    
-    print(f"🚀 Starting video processing task for video ID: {video_id}")
-    print(f"📊 Task parameters: youtube_video_id={youtube_video_id}, video_title={video_title}, is_transcript_available={is_transcript_availabe}")
-    
-    try:
-        db_client = fastapi_request.app.state.db_client
-        db_vector:VectorDBInterface= fastapi_request.app.state.vector_db 
-        video_model=VideoModel(db_client)
-        nlp_controller = NLPController()
-        generation_tool:GenerationInterface= fastapi_request.app.state.generation_model
-        print(f"Initialized all components for video ID: {video_id}")
-    except Exception as e:
-        print(f"Failed to initialize components for video ID {video_id}: {str(e)}")
-        print(f"Full traceback: {traceback.format_exc()}")
-        return
-
-    if is_transcript_availabe and youtube_transcript:
-        print(f"Transcript available for video ID: {video_id}, starting processing pipeline...")
-        
-        # step1: preprocess the transcript to generate chunks using chunk duration from settings
-        print(f"Step 1: Preprocessing transcript for video ID: {video_id}")
-        try:
-            chunk_duration = int(get_settings().CHUNK_DURATION * 60)
-            print(f" Using chunk duration: {chunk_duration} seconds")
-            
-            processed_transcript=nlp_controller.prepare_youtube_transcript_for_embedding(
-                transcript=youtube_transcript,
-                chunk_duration=chunk_duration
-            )
-            print(f" Step 1 completed: Processed transcript into {len(processed_transcript)} chunks for embedding.")
-        except Exception as e:
-            print(f" Step 1 failed - Error preprocessing transcript for video ID {video_id}: {str(e)}")
-            print(f"Full traceback: {traceback.format_exc()}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f"Updated video status to FAILED for video ID: {video_id}")
-            except Exception as status_error:
-                print(f"Failed to update video status: {status_error}")
-            return 
-
-        # step2: generate video summary using the generation model
-        print(f" Step 2: Generating video summary for video ID: {video_id}")
-        try:
-            if processed_transcript:
-                chunks=[chunk["text"] for chunk in processed_transcript]
-                print(f"Processing {len(chunks)} chunks for summary generation")
-                
-                print(f"Calling generation tool for video summary...")
-                video_summary= await asyncio.wait_for(
-                    generation_tool.generate_video_summary(chunks=chunks,video_title=video_title),
-                    timeout=300  # 5 minute timeout
-                )
-                print(f"Step 2 completed: Generated video summary (length: {len(video_summary)} chars)")
-            else:
-                video_summary="No transcript available to generate summary."
-                print(f"No processed transcript, using default summary")
-        except asyncio.TimeoutError:
-            print(f"Step 2 timeout - Video summary generation timed out for video ID: {video_id}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f"Updated video status to FAILED due to timeout for video ID: {video_id}")
-            except Exception as status_error:
-                print(f" Failed to update video status: {status_error}")
-            return
-        except Exception as e:
-            print(f" Step 2 failed - Error generating video summary for video ID {video_id}: {str(e)}")
-            print(f" Full traceback: {traceback.format_exc()}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f" Updated video status to FAILED for video ID: {video_id}")
-            except Exception as status_error:
-                print(f" Failed to update video status: {status_error}")
-            return 
-        
-        print(f" Step 2.5: Saving video summary to database for video ID: {video_id}")
-        try:
-            await video_model.add_video_summary(video_id=video_id,summary=video_summary)
-            print(f" Step 2.5 completed: Video summary updated in database for video ID: {video_id}")
-        except Exception as e:
-            print(f"Step 2.5 failed - Error updating video summary in database for video ID {video_id}: {str(e)}")
-            print(f"Full traceback: {traceback.format_exc()}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f" Updated video status to FAILED for video ID: {video_id}")
-            except Exception as status_error:
-                print(f" Failed to update video status: {status_error}")
-            return
-
-        # step3: create embeddings and save to vector db
-        print(f"Step 3: Creating embeddings and saving to vector DB for video ID: {video_id}")
-        try:
-            if processed_transcript:
-                print(f" Indexing {len(processed_transcript)} chunks in vector database...")
-                await asyncio.wait_for(
-                    db_vector.index(embedding_ready_data=processed_transcript,video_id=video_id),
-                    timeout=600  # 10 minute timeout for embedding
-                )
-                print(f" Step 3 completed: Transcript chunks embedded and saved to vector database for video ID: {video_id}")
-            else:
-                print(f" No processed transcript to embed for video ID: {video_id}")
-        except asyncio.TimeoutError:
-            print(f" Step 3 timeout - Vector database indexing timed out for video ID: {video_id}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f" Updated video status to FAILED due to timeout for video ID: {video_id}")
-            except Exception as status_error:
-                print(f" Failed to update video status: {status_error}")
-            return
-        except Exception as e:
-            print(f"Step 3 failed - Error saving embeddings to vector database for video ID {video_id}: {str(e)}")
-            print(f"Full traceback: {traceback.format_exc()}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f"Updated video status to FAILED for video ID: {video_id}")
-            except Exception as status_error:
-                print(f"Failed to update video status: {status_error}")
-            return
-        
-        # step4: update video status to completed
-        print(f" Step 4: Updating video status to READY for video ID: {video_id}")
-        try:
-            await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.READY.value)
-            print(f" Step 4 completed: Video processing completed successfully for video ID: {video_id}")
-
-        except Exception as e:
-            print(f" Step 4 failed - Error updating video status to completed for video ID {video_id}: {str(e)}")
-            print(f" Full traceback: {traceback.format_exc()}")
-            try:
-                await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-                print(f" Updated video status to FAILED for video ID: {video_id}")
-            except Exception as status_error:
-                print(f" Failed to update video status: {status_error}")
-            return
-        
-    else:
-        print(f" No transcript available for video ID: {video_id}; skipping processing steps.")
-        print(f" is_transcript_availabe: {is_transcript_availabe}, youtube_transcript length: {len(youtube_transcript) if youtube_transcript else 0}")
-        try:
-            await video_model.update_video_status(video_id=video_id,new_status=VideoStatusEnum.FAILED.value)
-            print(f" Updated video status to FAILED (no transcript) for video ID: {video_id}")
-        except Exception as status_error:
-            print(f" Failed to update video status: {status_error}")
-        return
-    
-    print(f"Video processing task completed successfully for video ID: {video_id}")
-    return
-    
+# concurrent POST /videos for the same ingestion key wait on a single lookup-or-create
+ingest_single_flight = SingleFlight()
 
 
-
-@router.post("/videos")
-async def add_new_video(request:Request,new_video: CreateNewVideoRequest,background_tasks: BackgroundTasks):
+async def _get_or_create_video(request:Request,new_video:CreateNewVideoRequest,youtube_id:str,ingest_key:str,chunking_config:dict):
     """
-    create a new chat based on youtube link
+    reuse a video already ingested with the same key (ready or still processing),
+    otherwise fetch the transcript, create the video and queue its ingestion job
     """
     db_client = request.app.state.db_client
     video_model=VideoModel(db_client)
-    video_controller = VideoController()
+    job_model=IngestionJobModel(db_client)
+    ingestion_pool:IngestionWorkerPool=request.app.state.ingestion_pool
+    video_controller = VideoController(http_client=request.app.state.http_client,transcript_executor=request.app.state.transcript_executor)
+    nlp_controller = NLPController()
+
+    try:
+        existing_video=await job_model.get_reusable_video_by_ingest_key(ingest_key=ingest_key)
+    except Exception as e:
+        return {"error": f"Error looking up existing video: {e}"}
+    if existing_video:
+        print(f"Reusing video ID: {existing_video.id} ({existing_video.vector_status}) for youtube id {youtube_id}")
+        return {
+            "video_id": existing_video.id,
+            "video_title": existing_video.youtube_title,
+            "transcript_language_exist": bool(existing_video.is_transcript_available),
+            "reused": True
+        }
+
     try:
-        # first get the video id and title from the youtube link
-        video_details=video_controller.get_video_info(new_video.youtube_link)
+        # get the video title and transcript from the youtube link
+        video_details=await video_controller.get_video_info(new_video.youtube_link,target_language=new_video.required_language)
         if not video_details:
             return {"error": "Invalid YouTube link or unable to fetch video details"}
         
-        video_id,video_title,is_transcript_availabe,transcript=video_details["video_id"],video_details["title"],video_details["transcript_available"],video_details["transcript"]
+        video_title,is_transcript_availabe,transcript=video_details["title"],video_details["transcript_available"],video_details["transcript"]
         if not is_transcript_availabe:
             print(f"No transcript available in the preferred languages {new_video.required_language}")
      
@@ -197,40 +57,65 @@ async def add_new_video(request:Request,new_video: CreateNewVideoRequest,backgro
         return {"error": f"Error processing YouTube link: {e}"}
     
     try:
-        # create video object        
-        video_obj = video_scheme(youtube_title=video_title,youtube_url=new_video.youtube_link,youtube_id=video_id,vector_status=VideoStatusEnum.PROCESSING.value,is_transcript_available=int(is_transcript_availabe))
+        # create video object, a video without transcript can not be processed
+        video_status=VideoStatusEnum.PROCESSING.value if is_transcript_availabe and transcript else VideoStatusEnum.FAILED.value
+        video_obj = video_scheme(youtube_title=video_title,youtube_url=new_video.youtube_link,youtube_id=youtube_id,vector_status=video_status,is_transcript_available=int(is_transcript_availabe))
         video_created_data=await video_model.add_Video(video_data=video_obj)
         print(f"Video saved to database with ID: {video_created_data}")
     except Exception as e:
         return {"error": f"Error saving video to database: {e}"}
 
-    # process the video in the background
-    try:
-        print(f"Initiating background task for video ID: {video_created_data.id}")
-        print(f"Task parameters: youtube_video_id={video_id}, title='{video_title}', transcript_available={is_transcript_availabe}, transcript_length={len(transcript) if transcript else 0}")
-        
-        background_tasks.add_task(
-            process_video_task,
-            fastapi_request=request,
-            video_id=video_created_data.id,
-            youtube_video_id=video_id,
-            is_transcript_availabe=is_transcript_availabe,
-            youtube_transcript=transcript,
-            video_title=video_title
-        )
-        print(f"Background task successfully queued for video ID: {video_created_data.id}")
-    except Exception as e:
-        print(f" Error starting background task for video ID {video_created_data.id}: {e}")
-        import traceback
-        print(f" Full traceback: {traceback.format_exc()}")
-        return {"error": f"Error starting background task: {e}"}
-    
-    
-    return JSONResponse(content={
+    # persist an ingestion job and queue it on the worker pool
+    if video_status==VideoStatusEnum.PROCESSING.value:
+        try:
+            snippets=nlp_controller.serialize_youtube_transcript(transcript=transcript)
+            job_obj=ingestion_job_scheme(
+                video_id=video_created_data.id,
+                video_title=video_title,
+                ingest_key=ingest_key,
+                language=new_video.required_language,
+                chunking_config=json.dumps(chunking_config),
+                transcript=json.dumps(snippets)
+            )
+            job_created_data=await job_model.add_job(job_data=job_obj)
+            await ingestion_pool.submit(job_created_data.id)
+            print(f"Ingestion job {job_created_data.id} queued for video ID: {video_created_data.id} ({len(snippets)} transcript snippets)")
+        except Exception as e:
+            print(f" Error queuing ingestion job for video ID {video_created_data.id}: {e}")
+            await video_model.update_video_status(video_id=video_created_data.id,new_status=VideoStatusEnum.FAILED.value)
+            return {"error": f"Error starting ingestion job: {e}"}
+
+    return {
         "video_id": video_created_data.id,
         "video_title": video_title,
-        "transcript_language_exist": is_transcript_availabe
-    })
+        "transcript_language_exist": is_transcript_availabe,
+        "reused": False
+    }
+
+
+@router.post("/videos")
+async def add_new_video(request:Request,new_video: CreateNewVideoRequest):
+    """
+    create a new chat based on youtube link
+    """
+    video_controller = VideoController(http_client=request.app.state.http_client,transcript_executor=request.app.state.transcript_executor)
+    nlp_controller = NLPController()
+
+    youtube_id=video_controller.get_youtube_id(new_video.youtube_link)
+    if not youtube_id:
+        return {"error": "Invalid YouTube link or unable to fetch video details"}
+
+    chunking_config=nlp_controller.get_chunking_config()
+    ingest_key=IngestionWorkerPool.make_ingest_key(youtube_id=youtube_id,language=new_video.required_language,chunking_config=chunking_config)
+
+    result=await ingest_single_flight.do(
+        ingest_key,
+        lambda: _get_or_create_video(request=request,new_video=new_video,youtube_id=youtube_id,ingest_key=ingest_key,chunking_config=chunking_config)
+    )
+    if "error" in result:
+        return result
+
+    return JSONResponse(content=result)
 
 
 
@@ -242,13 +127,17 @@ async def check_video_status(request:Request,video_id:str):
     """
     db_client = request.app.state.db_client
     video_model=VideoModel(db_client)
+    job_model=IngestionJobModel(db_client)
     try:
         video_data=await video_model.get_video_by_id(video_id=int(video_id))
         if not video_data:
             return JSONResponse(content={"error": "Video not found"},status_code=404)
         video_status=video_data.vector_status
+        job_data=await job_model.get_job_by_video_id(video_id=int(video_id))
+        stage=IngestionJobModel.reported_stage(job_data) if job_data else None
+        progress=request.app.state.ingestion_pool.index_progress.get(int(video_id))
       
-        return JSONResponse(content={"video_id":video_id,"status":video_status})
+        return JSONResponse(content={"video_id":video_id,"status":video_status,"stage":stage,"index_progress":progress})
     except Exception as e:
         return {"error": f"Error getting video from database: {e}"}
 
@@ -278,8 +167,12 @@ async def delete_video_by_id(request:Request,video_id:str):
     """
     db_client = request.app.state.db_client
     video_model=VideoModel(db_client)
+    vector_cleanup:VectorCleanupController=request.app.state.vector_cleanup
     try:    
         await video_model.delete_video_by_id(video_id=int(video_id))
-        return JSONResponse(content={"message": "Video deleted successfully"})
     except Exception as e:
-        return {"error": f"Error deleting video from database: {e}"}
\ No newline at end of file
+        return {"error": f"Error deleting video from database: {e}"}
+
+    # the video vectors are removed in the background
+    vector_cleanup.schedule(video_id=int(video_id))
+    return JSONResponse(content={"message": "Video deleted successfully"})
\ No newline at end of file
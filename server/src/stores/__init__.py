@@ -1,11 +1,21 @@
 from .generation.generation_interface import GenerationInterface
 from .vectordb.vectordb_interface import VectorDBInterface
+from .cache.llm_cache_interface import LLMCacheInterface
+from .embedding.embedding_interface import EmbeddingInterface
 
 from .vectordb.vectordb_factory import VectorDBFactory
 from .generation.generation_factory import GenerationFactory
+from .cache.llm_cache_factory import LLMCacheFactory
+from .embedding.embedding_factory import EmbeddingFactory
+from .lexical.bm25_index import BM25Store
+from .cache.retrieval_cache import RetrievalCache
+from .cache.answer_cache import SemanticAnswerCache
+from .vectordb.resilient import ResilientVectorDB
 
 
 from .prompts.chat_prompts import SYSTEM_PROMPT as CHAT_SYSTEM_PROMPT
 from .prompts.chat_prompts import USER_PROMPT as CHAT_USER_PROMPT
+from .prompts.chat_prompts import VIDEO_CONTEXT_PROMPT as CHAT_VIDEO_CONTEXT_PROMPT
+from .prompts.chat_prompts import MEMORY_PROMPT as CHAT_MEMORY_PROMPT
 from .prompts.map_prompt import MAP_PROMPT
 from .prompts.reduce_prompt import REDUCE_PROMPT
\ No newline at end of file
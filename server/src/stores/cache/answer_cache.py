@@ -0,0 +1,182 @@
+from collections import OrderedDict
+import hashlib
+import re
+import time
+import numpy as np
+from ..embedding.embedding_interface import EmbeddingInterface
+
+TERM_PATTERN = re.compile(r"[\w']+", re.UNICODE)
+# numbers and timestamps ("3", "2.5", "12:30", "1:02:15") a question refers to
+NUMBER_PATTERN = re.compile(r"\d+(?:[:.]\d+)*")
+NEGATIONS = {"not", "no", "never", "none", "nothing", "nobody", "neither", "nor", "without", "cannot"}
+
+
+class VideoAnswers:
+    """Cached answers of one video, question vectors are kept stacked for a single matrix-vector lookup."""
+    def __init__(self):
+        self.questions: list[str] = []
+        self.answers: list[str] = []
+        self.vectors: list[np.ndarray] = []
+        self.created_at: list[float] = []
+        self.summary_keys: list[str] = []
+        self.matrix: np.ndarray | None = None
+
+    def add(self, question: str, answer: str, vector: np.ndarray, summary_key: str):
+        self.questions.append(question)
+        self.answers.append(answer)
+        self.vectors.append(vector)
+        self.created_at.append(time.time())
+        self.summary_keys.append(summary_key)
+        self.matrix = None
+
+    def remove(self, position: int) -> int:
+        """Remove one entry and return the answer size it held."""
+        size = len(self.answers[position].encode("utf-8"))
+        for values in (self.questions, self.answers, self.vectors, self.created_at, self.summary_keys):
+            del values[position]
+        self.matrix = None
+        return size
+
+    def stacked(self) -> np.ndarray:
+        if self.matrix is None:
+            self.matrix = np.stack(self.vectors)
+        return self.matrix
+
+
+class SemanticAnswerCache:
+    """
+    Answers of standalone questions, scoped per video. A question is served from the cache when its
+    embedding has a cosine similarity of at least `threshold` with an earlier question of the same video
+    asked with the same video summary, unless the two questions conflict (see `conflicts`). Entries expire after
+    `ttl_seconds`; when the cache holds more than `max_entries` answers or `max_bytes` of answer text the oldest
+    entries are evicted.
+    """
+    def __init__(self, embedding: EmbeddingInterface, threshold: float, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.videos: dict[str, VideoAnswers] = {}
+        # (video_id, created_at, sequence) in insertion order, used to evict the oldest entries first
+        self.order: OrderedDict[tuple[str, float, int], None] = OrderedDict()
+        self.generations: dict[str, int] = {}
+        self.sequence = 0
+
+        self.entries = 0
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+
+    @staticmethod
+    def _markers(question: str) -> tuple[bool, frozenset[str]]:
+        """(whether the question is negated, numbers and timestamps it mentions)."""
+        text = question.lower()
+        negated = any(term in NEGATIONS or term.endswith("n't") for term in TERM_PATTERN.findall(text))
+        return negated, frozenset(NUMBER_PATTERN.findall(text))
+
+
+    @classmethod
+    def conflicts(cls, question: str, other: str) -> bool:
+        """Close embeddings that still ask different things: only one of the two is negated
+        ("should I buy it" / "should I not buy it") or they mention different numbers or timestamps."""
+        return cls._markers(question) != cls._markers(other)
+
+
+    @staticmethod
+    def summary_key(summary: str | None) -> str:
+        return hashlib.sha256((summary or "").encode("utf-8")).hexdigest()
+
+
+    def generation(self, video_id) -> int:
+        return self.generations.get(str(video_id), 0)
+
+
+    async def lookup(self, video_id, question: str, summary: str | None) -> str | None:
+        video_id = str(video_id)
+        answers = self.videos.get(video_id)
+        if answers is None or not answers.answers:
+            self.misses += 1
+            return None
+
+        vector = await self.embedding.embed_query(question)
+        similarities = answers.stacked() @ vector
+        summary_key = self.summary_key(summary)
+        now = time.time()
+        for position in np.argsort(-similarities):
+            if similarities[position] < self.threshold:
+                break
+            if self.conflicts(question, answers.questions[position]):
+                continue
+            if answers.summary_keys[position] == summary_key and now - answers.created_at[position] <= self.ttl_seconds:
+                self.hits += 1
+                print(f"Answer cache hit for video {video_id} (similarity {similarities[position]:.3f} with '{answers.questions[position]}')")
+                return answers.answers[position]
+        self.misses += 1
+        return None
+
+
+    async def store(self, video_id, question: str, answer: str, summary: str | None, generation: int):
+        """Cache an answer, skipped when the video was invalidated since `generation` was read."""
+        video_id = str(video_id)
+        size = len(answer.encode("utf-8"))
+        if generation != self.generation(video_id) or size > self.max_bytes:
+            return
+        vector = await self.embedding.embed_query(question)
+        answers = self.videos.setdefault(video_id, VideoAnswers())
+        answers.add(question, answer, vector, self.summary_key(summary))
+        self.sequence += 1
+        self.order[(video_id, answers.created_at[-1], self.sequence)] = None
+        self.entries += 1
+        self.total_bytes += size
+        self.stores += 1
+        self._evict()
+
+
+    def _evict(self):
+        now = time.time()
+        while self.order:
+            video_id, created_at, _ = next(iter(self.order))
+            expired = now - created_at > self.ttl_seconds
+            if not expired and self.entries <= self.max_entries and self.total_bytes <= self.max_bytes:
+                break
+            self.order.popitem(last=False)
+            answers = self.videos.get(video_id)
+            if answers is None or not answers.answers:
+                continue
+            # entries of a video are appended in time order, so its oldest one is first
+            self.total_bytes -= answers.remove(0)
+            self.entries -= 1
+            self.evictions += 1
+            if not answers.answers:
+                del self.videos[video_id]
+
+
+    def invalidate_video(self, video_id):
+        """Drop the answers of a video, called when its summary or its index changes or it is deleted."""
+        video_id = str(video_id)
+        self.generations[video_id] = self.generation(video_id) + 1
+        answers = self.videos.pop(video_id, None)
+        if answers is not None:
+            self.entries -= len(answers.answers)
+            self.total_bytes -= sum(len(answer.encode("utf-8")) for answer in answers.answers)
+            self.order = OrderedDict((key, None) for key in self.order if key[0] != video_id)
+        self.invalidations += 1
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": self.entries,
+            "bytes": self.total_bytes,
+        }
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class LLMCacheType(str, Enum):
+    DISK = "disk"
+    NONE = "none"
\ No newline at end of file
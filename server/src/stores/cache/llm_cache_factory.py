@@ -0,0 +1,20 @@
+from .cache_enum import LLMCacheType
+from .providers.disk import DiskLLMCache
+from ...utils.settings import get_settings
+
+
+class LLMCacheFactory:
+    def __init__(self):
+        pass
+
+    def create_cache(self, cache_type: LLMCacheType):
+        if cache_type == LLMCacheType.DISK.value:
+            return DiskLLMCache(
+                path=get_settings().LLM_CACHE_PATH,
+                max_entries=get_settings().LLM_CACHE_MAX_ENTRIES,
+                max_bytes=get_settings().LLM_CACHE_MAX_BYTES,
+            )
+        elif cache_type == LLMCacheType.NONE.value:
+            return None
+        else:
+            raise ValueError(f"Unsupported llm cache type: {cache_type}")
\ No newline at end of file
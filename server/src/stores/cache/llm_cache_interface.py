@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+import hashlib
+import json
+
+
+class LLMCacheInterface(ABC):
+    """Abstract base class for content addressed caches of LLM outputs, every storage call is awaited."""
+
+    @staticmethod
+    def make_key(messages: list[dict], model: str, temperature: float, max_tokens: int | None = None) -> str:
+        """Hash of everything that determines the output: prompt template, input text, model and sampling."""
+        payload = json.dumps(
+            {"messages": messages, "model": model, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    async def connect(self):
+        """Open the cache storage."""
+        pass
+
+    @abstractmethod
+    async def disconnect(self):
+        """Close the cache storage."""
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """Return the cached output for the key or None on a miss."""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str):
+        """Store an output, evicting the least recently used entries when the cache is full."""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and current size."""
+        pass
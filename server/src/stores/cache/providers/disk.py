@@ -0,0 +1,148 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from ..llm_cache_interface import LLMCacheInterface
+
+
+class DiskLLMCache(LLMCacheInterface):
+    """
+    LLM output cache in a local sqlite file, bounded by entry count and total bytes with LRU eviction.
+    sqlite calls run in a worker thread so lookups never block the event loop.
+    Access times of hits are kept in memory and written in one batch before an eviction, on close,
+    or once `access_flush_size` hits are pending, so a lookup is a plain SELECT.
+    """
+    def __init__(self, path: str, max_entries: int, max_bytes: int, access_flush_size: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.conn = None
+        self.lock = threading.Lock()
+        self.access_flush_size = access_flush_size
+        self.pending_access: dict[str, float] = {}
+
+        self.entries = 0
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+
+    async def connect(self):
+        await asyncio.to_thread(self._connect)
+
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+        self.conn.commit()
+        self.entries, self.total_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+
+
+    async def disconnect(self):
+        if self.conn is not None:
+            with self.lock:
+                self._flush_access()
+                self.conn.commit()
+                self.conn.close()
+            self.conn = None
+
+
+    async def get(self, key: str) -> str | None:
+        value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+
+    def _get(self, key: str) -> str | None:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.pending_access[key] = time.time()
+            if len(self.pending_access) >= self.access_flush_size:
+                self._flush_access()
+                self.conn.commit()
+            return row[0]
+
+
+    def _flush_access(self):
+        """Write the pending access times in one statement, caller holds the lock and commits."""
+        if not self.pending_access:
+            return
+        self.conn.executemany(
+            "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self.pending_access.items()],
+        )
+        self.pending_access = {}
+
+
+    async def set(self, key: str, value: str):
+        await asyncio.to_thread(self._set, key, value)
+        self.writes += 1
+
+
+    def _set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self.pending_access.pop(key, None)
+            previous = self.conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            if previous is None:
+                self.entries += 1
+                self.total_bytes += size
+            else:
+                self.total_bytes += size - previous[0]
+            self._evict()
+            self.conn.commit()
+
+
+    def _evict(self):
+        """Drop least recently used entries until both bounds hold, caller holds the lock."""
+        if self.entries > self.max_entries or self.total_bytes > self.max_bytes:
+            # recent hits must count before the least recently used rows are picked
+            self._flush_access()
+        while self.entries > self.max_entries or self.total_bytes > self.max_bytes:
+            overflow = max(self.entries - self.max_entries, 1)
+            rows = self.conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access ASC LIMIT ?", (overflow,)
+            ).fetchall()
+            if not rows:
+                break
+            self.conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(row[0],) for row in rows])
+            self.entries -= len(rows)
+            self.total_bytes -= sum(row[1] for row in rows)
+            self.evictions += len(rows)
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": self.entries,
+            "bytes": self.total_bytes,
+        }
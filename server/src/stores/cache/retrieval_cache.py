@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import re
+import time
+from typing import Any, Awaitable, Callable
+from ...utils.single_flight import SingleFlight
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class RetrievalCache:
+    """
+    In-process LRU cache with a TTL for retrieval results, keyed on (video_id, normalized query, top_k).
+    Concurrent misses for one key share a single search. Every video has a generation number that
+    invalidate_video() bumps, so results computed before a re-index or a delete are never served or stored.
+    """
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> (expires_at, fetch latency in seconds, value)
+        self.entries: OrderedDict[tuple, tuple[float, float, Any]] = OrderedDict()
+        self.generations: dict[str, int] = {}
+        self.single_flight = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.uncacheable = 0
+        self.latency_saved = 0.0
+
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return WHITESPACE_PATTERN.sub(" ", query).strip().rstrip("?!.").strip().lower()
+
+
+    def _key(self, video_id, query: str, top_k: int) -> tuple:
+        video_id = str(video_id)
+        return (video_id, self.generations.get(video_id, 0), self.normalize_query(query), top_k)
+
+
+    def _lookup(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+
+    async def get_or_fetch(self, video_id, query: str, top_k: int, fetch: Callable[[], Awaitable[Any]],
+                           cacheable: Callable[[Any], bool] = None) -> Any:
+        """Cached value of the key, or the fetched one. A fetched value for which cacheable() is False is returned but not stored."""
+        key = self._key(video_id, query, top_k)
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            self.latency_saved += entry[1]
+            return entry[2]
+
+        self.misses += 1
+        return await self.single_flight.do(key, lambda: self._fetch_and_store(key, fetch, cacheable))
+
+
+    async def _fetch_and_store(self, key: tuple, fetch: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool] = None) -> Any:
+        started = time.monotonic()
+        value = await fetch()
+        latency = time.monotonic() - started
+        if cacheable is not None and not cacheable(value):
+            self.uncacheable += 1
+            return value
+        # skip the write when the video was invalidated while the search was running
+        if self.generations.get(key[0], 0) == key[1]:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, latency, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+
+    def invalidate_video(self, video_id):
+        """Drop every cached result of the video, called after it is re-indexed or deleted."""
+        video_id = str(video_id)
+        self.generations[video_id] = self.generations.get(video_id, 0) + 1
+        stale = [key for key in self.entries if key[0] == video_id]
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += 1
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.single_flight.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "latency_saved_ms": round(self.latency_saved * 1000, 1),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "uncacheable": self.uncacheable,
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+import hashlib
+import numpy as np
+from .embedding_interface import EmbeddingInterface
+
+
+class CachedEmbedding(EmbeddingInterface):
+    """
+    Wraps a provider with an in-memory LRU cache keyed by the hash of the provider name and the text,
+    so repeated questions and unchanged chunks are never embedded twice. Only misses reach the provider,
+    deduplicated and in one batched call.
+    """
+    def __init__(self, provider: EmbeddingInterface, max_entries: int):
+        self.provider = provider
+        self.name = provider.name
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, np.ndarray] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def connect(self):
+        self.provider.connect()
+
+
+    def disconnect(self):
+        self.provider.disconnect()
+        self.entries.clear()
+
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.name}\0{text}".encode("utf-8")).hexdigest()
+
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        keys = [self.make_key(text) for text in texts]
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            elif key not in missing:
+                missing[key] = text
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        computed = {}
+        if missing:
+            vectors = await self.provider.embed(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            for key, vector in computed.items():
+                self._put(key, vector)
+
+        if not texts:
+            return await self.provider.embed([])
+        return np.stack([computed[key] if key in computed else self.entries[key] for key in keys])
+
+
+    def _put(self, key: str, vector: np.ndarray):
+        self.entries[key] = vector
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "provider": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class EmbeddingType(str, Enum):
+    HASHING = "hashing"
+    REMOTE = "remote"
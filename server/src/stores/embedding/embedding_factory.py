@@ -0,0 +1,23 @@
+from .embedding_enum import EmbeddingType
+from .embedding_interface import EmbeddingInterface
+from .embedding_cache import CachedEmbedding
+from .providers.hashing import HashingEmbedding
+from .providers.remote import RemoteEmbedding
+from ...utils.settings import get_settings
+
+
+class EmbeddingFactory:
+    def __init__(self):
+        pass
+
+    def create_provider(self, provider_name: EmbeddingType) -> EmbeddingInterface:
+        if provider_name == EmbeddingType.HASHING.value:
+            provider = HashingEmbedding(dim=get_settings().EMBEDDING_DIM, batch_size=get_settings().EMBEDDING_BATCH_SIZE)
+        elif provider_name == EmbeddingType.REMOTE.value:
+            provider = RemoteEmbedding(model=get_settings().EMBEDDING_MODEL, batch_size=get_settings().EMBEDDING_BATCH_SIZE)
+        else:
+            raise ValueError(f"Unknown embedding provider: {provider_name}")
+
+        if get_settings().EMBEDDING_CACHE_MAX_ENTRIES > 0:
+            return CachedEmbedding(provider, max_entries=get_settings().EMBEDDING_CACHE_MAX_ENTRIES)
+        return provider
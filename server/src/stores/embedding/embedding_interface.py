@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class EmbeddingInterface(ABC):
+    """Abstract base class for text embedding providers."""
+
+    # identifies the model and its configuration, part of every embedding cache key
+    name: str = ""
+
+    @abstractmethod
+    def connect(self):
+        """Prepare the provider (clients, models)."""
+        pass
+
+    @abstractmethod
+    def disconnect(self):
+        """Release the provider resources."""
+        pass
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts in batches.
+        Returns a float32 array of shape (len(texts), dim) whose rows are L2 normalized."""
+        pass
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single search query."""
+        return (await self.embed([text]))[0]
+
+    def stats(self) -> dict:
+        """Provider or cache counters, empty by default."""
+        return {}
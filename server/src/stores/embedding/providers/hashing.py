@@ -0,0 +1,52 @@
+import asyncio
+import re
+import zlib
+import numpy as np
+from ..embedding_interface import EmbeddingInterface
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedding(EmbeddingInterface):
+    """
+    Local CPU embedding: signed feature hashing of word unigrams and bigrams into `dim` buckets,
+    log scaled and L2 normalized. Needs no model download and no network.
+    """
+    def __init__(self, dim: int, batch_size: int):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"hashing-{dim}"
+
+
+    def connect(self):
+        return
+
+
+    def disconnect(self):
+        return
+
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = TOKEN_PATTERN.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+            signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+            np.add.at(matrix[row], (hashes % self.dim).astype(np.int64), signs)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        batches = [
+            await asyncio.to_thread(self._embed_batch, texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(batches)
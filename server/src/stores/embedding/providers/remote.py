@@ -0,0 +1,48 @@
+import asyncio
+import numpy as np
+import openai
+from ..embedding_interface import EmbeddingInterface
+from ....utils.settings import get_settings
+
+
+class RemoteEmbedding(EmbeddingInterface):
+    """Embeddings from an OpenAI compatible /embeddings endpoint (the LiteLLM proxy), sent in batches."""
+    def __init__(self, model: str, batch_size: int, max_concurrency: int = 4):
+        self.model = model
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = None
+        self.name = f"remote-{model}"
+
+
+    def connect(self):
+        self.client = openai.AsyncClient(
+            api_key="any key",
+            base_url=get_settings().LITELLM_BASE_URL,
+        )
+
+
+    def disconnect(self):
+        self.client = None
+
+
+    async def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        async with self.semaphore:
+            response = await self.client.embeddings.create(model=self.model, input=texts)
+        rows = sorted(response.data, key=lambda item: item.index)
+        matrix = np.asarray([row.embedding for row in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        if self.client is None:
+            raise Exception("RemoteEmbedding not connected")
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = await asyncio.gather(*[
+            self._embed_batch(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ])
+        return np.concatenate(batches)
@@ -1,14 +1,15 @@
 from .providers.litellm import LiteLLMProvider
 from .generation_interface import GenerationInterface
 from .generation_enum import GenerationType
+from ..cache.llm_cache_interface import LLMCacheInterface
 
 
 class GenerationFactory:
     def __init__(self):
         pass
 
-    def create_provider(self, provider_name: GenerationType) -> GenerationInterface:
+    def create_provider(self, provider_name: GenerationType, llm_cache: LLMCacheInterface = None) -> GenerationInterface:
         if provider_name == GenerationType.LITELLM.value:
-            return LiteLLMProvider()
+            return LiteLLMProvider(llm_cache=llm_cache)
         else:
             raise ValueError(f"Unknown provider: {provider_name}")
\ No newline at end of file
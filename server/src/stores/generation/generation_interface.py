@@ -15,12 +15,30 @@ class GenerationInterface(ABC):
     def generate_answer(self, message: list[dict]) -> str:
         """Generate text based on the provided prompt."""
         pass
+
+    @abstractmethod
+    def generate_answer_stream(self, message: list[dict]):
+        """Streaming variant of generate_answer, an async generator of events:
+        {"type": "token", "content": str} for every text delta of the answer, then one final
+        {"type": "tool_calls", "calls": [...], "content": str} with the calls in the get_tool_agrs format and the text
+        streamed before them, or {"type": "done", "content": str}."""
+        pass
+    def stats(self) -> dict:
+        """Provider counters exposed on /metrics, empty by default."""
+        return {}
+
     @abstractmethod
     def get_tool_agrs(self,msg):
-        """Extract tool arguments from the model's message."""
+        """Extract the tool calls of the model's message as a list of {"id", "name", "arguments"},
+        arguments is the parsed dict or None when it is not valid json. None when the message has no tool calls."""
         pass
 
     @abstractmethod
     def generate_video_summary(self,chunks: List[str],video_title:str) -> Dict[str, List[str]]:
         """Generate text using the provided tool arguments."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def summarize_conversation(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """Fold chat messages [{'role','content'}] into the rolling summary of the conversation."""
+        pass
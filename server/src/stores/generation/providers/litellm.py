@@ -4,41 +4,89 @@ from ....utils.settings import get_settings
 import json
 from typing import List, Dict, Any
 from ...prompts.map_prompt import MAP_PROMPT
-from ...prompts.reduce_prompt import REDUCE_PROMPT
+from ...prompts.reduce_prompt import REDUCE_PROMPT, PARTIAL_REDUCE_PROMPT
+from ...prompts.memory_prompt import MEMORY_PROMPT
+from ..rate_limiter import RateLimitedScheduler
+from ...cache.llm_cache_interface import LLMCacheInterface
+from ....utils.tokens import estimate_messages_tokens, estimate_tokens, CHARS_PER_TOKEN
 import asyncio
 
 class LiteLLMProvider(GenerationInterface):
-    def __init__(self):
+    def __init__(self, llm_cache: LLMCacheInterface = None):
         self.client = None
+        self.llm_cache = llm_cache
         self.temperature = 0.1
         self.max_tokens = 2048
         self.TOOLS = [
                     {
-                        "name": "get_relevant_chunks",
-                        "description": (
-                            "Performs a semantic search over the knowledge base (KB) for the specified document IDs. "
-                            "Returns the most relevant text chunks that match the user's query. "
-                            "Useful for retrieving context or facts from large documents."
-                        ),
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "user_query": {
-                                    "type": "string",
-                                    "description": "The search query or question from the user."
+                        "type": "function",
+                        "function": {
+                            "name": "get_relevant_chunks",
+                            "description": (
+                                "Performs a semantic search over the knowledge base (KB) for the specified document IDs. "
+                                "Returns the most relevant text chunks that match the user's query. "
+                                "Useful for retrieving context or facts from large documents."
+                            ),
+                            "parameters": {
+                                "type": "object",
+                                "properties": {
+                                    "user_query": {
+                                        "type": "string",
+                                        "description": "The search query or question from the user."
+                                    },
+                                    "top_k": {
+                                        "type": "integer",
+                                        "default": 3,
+                                        "description": "The number of top matching chunks to return."
+                                    }
                                 },
-                                "top_k": {
-                                    "type": "integer",
-                                    "default": 3,
-                                    "description": "The number of top matching chunks to return."
-                                }
-                            },
-                            "required": ["user_query"]
+                                "required": ["user_query"]
+                            }
+                        }
+                    },
+                    {
+                        "type": "function",
+                        "function": {
+                            "name": "get_chunks_by_time",
+                            "description": (
+                                "Returns the transcript of the video between two timestamps, without a semantic search. "
+                                "Use it when the user refers to a moment of the video (e.g. 'what is said around 12:30')."
+                            ),
+                            "parameters": {
+                                "type": "object",
+                                "properties": {
+                                    "start": {
+                                        "type": "string",
+                                        "description": "Start of the window, in seconds or as mm:ss / hh:mm:ss."
+                                    },
+                                    "end": {
+                                        "type": "string",
+                                        "description": "End of the window, in seconds or as mm:ss / hh:mm:ss. Defaults to one minute after start."
+                                    }
+                                },
+                                "required": ["start"]
+                            }
                         }
                     }
                 ]
         
-        self.batch_size = 6
+        # prompt token usage of chat answers, cached_prompt_tokens counts the prefix the provider served from its prompt cache
+        self.chat_requests = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+
+        # reduce inputs are packed into groups of at most this many tokens
+        self.reduce_token_budget = get_settings().REDUCE_TOKEN_BUDGET
+        self.partial_reduce_max_tokens = min(self.max_tokens, self.reduce_token_budget // 4)
+
+        # shared by every summary in the process so concurrent ingestions stay inside the provider quota
+        self.map_reduce_scheduler = RateLimitedScheduler(
+            requests_per_minute=get_settings().MAP_REDUCE_REQUESTS_PER_MINUTE,
+            tokens_per_minute=get_settings().MAP_REDUCE_TOKENS_PER_MINUTE,
+            max_concurrency=get_settings().MAP_REDUCE_MAX_CONCURRENCY,
+            max_retries=get_settings().MAP_REDUCE_MAX_RETRIES,
+        )
 
 
     def connect(self):
@@ -51,11 +99,44 @@ class LiteLLMProvider(GenerationInterface):
     def disconnect(self):
         self.client = None
 
+    @staticmethod
+    def _parse_arguments(arguments: str) -> dict | None:
+        try:
+            args = json.loads(arguments or "{}")
+        except json.JSONDecodeError:
+            return None
+        return args if isinstance(args, dict) else None
+
     def get_tool_agrs(self,msg):
-        if getattr(msg, "function_call", None):
-            args = json.loads(msg.function_call.model_dump()["arguments"] or "{}")
-            return args
-        return None
+        tool_calls = getattr(msg, "tool_calls", None)
+        if not tool_calls:
+            return None
+        return [
+            {"id": call.id, "name": call.function.name, "arguments": self._parse_arguments(call.function.arguments)}
+            for call in tool_calls
+        ]
+
+    def _record_usage(self, usage):
+        if usage is None:
+            return
+        self.chat_requests += 1
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details is not None else None
+        if cached is None:
+            # anthropic style usage passed through by litellm
+            cached = getattr(usage, "cache_read_input_tokens", 0)
+        self.cached_prompt_tokens += cached or 0
+
+    def stats(self) -> dict:
+        return {
+            "chat_requests": self.chat_requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "cached_ratio": round(self.cached_prompt_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+            "completion_tokens": self.completion_tokens,
+        }
 
     async def generate_answer(self, message:list[dict]):
         if self.client is None:
@@ -65,68 +146,264 @@ class LiteLLMProvider(GenerationInterface):
             messages=message,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
-            functions=self.TOOLS,
-            function_call="auto"
+            tools=self.TOOLS,
+            tool_choice="auto",
+            parallel_tool_calls=True
         )
-        #         
+        self._record_usage(getattr(response, "usage", None))
         if response and response.choices:
             if response.choices[0].message:
                 msg = response.choices[0].message
                 return msg
             
         return "No response from LiteLLM"
+
+
+    async def generate_answer_stream(self, message: list[dict]):
+        if self.client is None:
+            raise Exception("LiteLLMProvider not connected")
+        stream = await self.client.chat.completions.create(
+            model=get_settings().LITELLM_BASE_MODEL,
+            messages=message,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            tools=self.TOOLS,
+            tool_choice="auto",
+            parallel_tool_calls=True,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        content_parts = []
+        # tool calls arrive as fragments keyed by their index in the turn, they are only reported once complete
+        tool_calls: dict[int, dict] = {}
+        async for chunk in stream:
+            # the usage arrives on a last chunk without choices
+            if getattr(chunk, "usage", None):
+                self._record_usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if getattr(delta, "tool_calls", None):
+                for fragment in delta.tool_calls:
+                    call = tool_calls.setdefault(fragment.index, {"id": None, "name": None, "arguments": []})
+                    if fragment.id:
+                        call["id"] = fragment.id
+                    if fragment.function and fragment.function.name:
+                        call["name"] = fragment.function.name
+                    if fragment.function and fragment.function.arguments:
+                        call["arguments"].append(fragment.function.arguments)
+            elif delta.content:
+                content_parts.append(delta.content)
+                yield {"type": "token", "content": delta.content}
+
+        if tool_calls:
+            yield {"type": "tool_calls", "content": "".join(content_parts), "calls": [
+                {"id": call["id"], "name": call["name"], "arguments": self._parse_arguments("".join(call["arguments"]))}
+                for _, call in sorted(tool_calls.items())
+            ]}
+        else:
+            yield {"type": "done", "content": "".join(content_parts)}
     
     
-    async def _get_chunk_summary(self,chunk: str) -> List[str]:
-        message = [
+    def _map_messages(self, chunk: str) -> list[dict]:
+        return [
             {"role": "system", "content": MAP_PROMPT},
             {"role": "user", "content": chunk}
         ]
 
-        response = await self.client.chat.completions.create(
+
+    def _estimate_call_tokens(self, messages: list[dict], max_tokens: int) -> int:
+        # reserve prompt plus completion budget, the unused part is refunded from the response usage
+        return estimate_messages_tokens(messages) + max_tokens
+
+
+    def _response_tokens(self, response) -> int | None:
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", None)
+
+
+    async def _map_reduce_completion(self, messages: list[dict], temperature: float, max_tokens: int):
+        return await self.client.chat.completions.create(
             model=get_settings().LITELLM_MAP_REDUCE_MODEL,
-            messages=message,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
         )
-        content = response.choices[0].message.content
-        print("Chunk summary:", content)
-        return content
+
+
+    async def _run_map_reduce_calls(self, message_lists: List[list[dict]], temperature: float, max_tokens: int) -> List[str | None]:
+        """
+        Run map/reduce completions, answering from the llm cache first.
+        Only cache misses go through the rate aware scheduler, results keep the input order
+        and a call that keeps failing yields None.
+        """
+        model = get_settings().LITELLM_MAP_REDUCE_MODEL
+        keys = [LLMCacheInterface.make_key(messages, model, temperature, max_tokens) for messages in message_lists]
+
+        if self.llm_cache is not None:
+            results = list(await asyncio.gather(*[self.llm_cache.get(key) for key in keys]))
+        else:
+            results = [None] * len(message_lists)
+
+        # empty entries written before empty outputs were skipped count as misses
+        missing = [i for i, result in enumerate(results) if not result]
+        if len(missing) < len(message_lists):
+            print(f"LLM cache answered {len(message_lists) - len(missing)}/{len(message_lists)} calls")
+
+        responses = await self.map_reduce_scheduler.map(
+            lambda i: self._map_reduce_completion(message_lists[i], temperature, max_tokens),
+            missing,
+            estimate=lambda i: self._estimate_call_tokens(message_lists[i], max_tokens),
+            actual_tokens=self._response_tokens,
+        )
+        for i, response in zip(missing, responses):
+            if response is None:
+                continue
+            results[i] = response.choices[0].message.content or ""
+            # an empty output (truncated or filtered response) is used once but never cached, a re-ingest retries it
+            if self.llm_cache is not None and results[i].strip():
+                await self.llm_cache.set(keys[i], results[i])
+
+        return results
     
     
-    async def _run_batched_tasks(self,chunks: List[str]):
-        total_summaries = []
-
-        for i in range(0, len(chunks), self.batch_size):
-            batch = chunks[i:i + self.batch_size]
+    async def _run_scheduled_tasks(self,chunks: List[str]) -> List[str]:
+        """Summarize every chunk, chunks that keep failing are skipped."""
+        chunk_summaries = await self._run_map_reduce_calls(
+            [self._map_messages(chunk) for chunk in chunks],
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
 
-            tasks = [
-                    self._get_chunk_summary(chunk)
-                    for chunk in batch
-            ]
+        total_summaries = []
+        for i, content in enumerate(chunk_summaries):
+            if content is None:
+                print(f"Skipping chunk {i}, summary failed after retries")
+                continue
+            print("Chunk summary:", content)
+            total_summaries.append(content)
 
-            batched_summaries = await asyncio.gather(*tasks)
-            for chunk_data in batched_summaries:
-                total_summaries.append(chunk_data)
-            await asyncio.sleep(1.5) 
+        if not total_summaries:
+            raise Exception("All chunk summaries failed")
+        if len(total_summaries) < len(chunks):
+            print(f"Summarized {len(total_summaries)}/{len(chunks)} chunks")
 
         return total_summaries
     
 
-    async def generate_video_summary(self,chunks: List[str],video_title:str) -> Dict[str, List[str]]:
+    def _group_by_token_budget(self, summaries: List[str]) -> List[List[str]]:
+        """
+        Pack consecutive summaries into groups that fit the reduce token budget.
+        Each summary is capped at half the budget so every group merges at least two of them
+        and every reduce level shrinks the list, `_shrink_oversized` runs first so the cap is a last resort.
+        """
+        max_item_tokens = self.reduce_token_budget // 2
+        groups, current, current_tokens = [], [], 0
+        for i, summary in enumerate(summaries):
+            if estimate_tokens(summary) > max_item_tokens:
+                print(f"Truncating summary {i} from ~{estimate_tokens(summary)} to {max_item_tokens} tokens to fit the reduce budget")
+                summary = summary[: max_item_tokens * CHARS_PER_TOKEN]
+            tokens = estimate_tokens(summary)
+            if current and current_tokens + tokens > self.reduce_token_budget:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
 
-        total_summaries =  await self._run_batched_tasks(chunks=chunks)
 
-        response = await self.client.chat.completions.create(
-            model=get_settings().LITELLM_MAP_REDUCE_MODEL,
+    async def _shrink_oversized(self, summaries: List[str], video_title: str) -> List[str]:
+        """Summarize again every summary longer than half the reduce budget, instead of cutting it."""
+        max_item_tokens = self.reduce_token_budget // 2
+        oversized = [i for i, summary in enumerate(summaries) if estimate_tokens(summary) > max_item_tokens]
+        if not oversized:
+            return summaries
+
+        print(f"Summarizing {len(oversized)} oversized summaries again to fit the reduce budget")
+        partial_prompt = PARTIAL_REDUCE_PROMPT.format(video_title=video_title, max_part_words=int(self.partial_reduce_max_tokens * 0.6))
+        results = await self._run_map_reduce_calls(
+            [self._reduce_messages(partial_prompt, [summaries[i]]) for i in oversized],
             temperature=0.0,
-            messages=[
-                {"role": "system", "content": REDUCE_PROMPT.format(video_title=video_title, max_final_words=360)},
-                {"role": "user", "content":"\n".join(total_summaries)}
-            ],
+            max_tokens=self.partial_reduce_max_tokens,
         )
-        final_summary = response.choices[0].message.content
+        summaries = list(summaries)
+        for i, result in zip(oversized, results):
+            # a failed or empty pass keeps the original, it is truncated when grouped
+            if result and result.strip():
+                summaries[i] = result
+        return summaries
+
+
+    def _reduce_messages(self, system_prompt: str, summaries: List[str]) -> list[dict]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content":"\n".join(summaries)}
+        ]
+
+
+    async def _tree_reduce(self, summaries: List[str], video_title: str) -> str:
+        """
+        Reduce the map summaries level by level: budget sized groups are merged concurrently
+        until everything fits in one final reduce call, so prompt size stays bounded for any video length.
+        """
+        groups = self._group_by_token_budget(await self._shrink_oversized(summaries, video_title))
+        level = 0
+        while len(groups) > 1:
+            level += 1
+            print(f"Reduce level {level}: merging {sum(len(g) for g in groups)} summaries in {len(groups)} groups")
+            partial_prompt = PARTIAL_REDUCE_PROMPT.format(video_title=video_title, max_part_words=int(self.partial_reduce_max_tokens * 0.6))
+            results = await self._run_map_reduce_calls(
+                [self._reduce_messages(partial_prompt, group) for group in groups],
+                temperature=0.0,
+                max_tokens=self.partial_reduce_max_tokens,
+            )
+            partials = [result for result in results if result is not None]
+            if not partials:
+                raise Exception(f"All partial reduces failed at level {level}")
+            if len(partials) < len(groups):
+                print(f"Reduce level {level}: {len(groups) - len(partials)} groups failed and were skipped")
+            groups = self._group_by_token_budget(await self._shrink_oversized(partials, video_title))
+
+        final_prompt = REDUCE_PROMPT.format(video_title=video_title, max_final_words=360)
+        [final_summary] = await self._run_map_reduce_calls(
+            [self._reduce_messages(final_prompt, groups[0])],
+            temperature=0.0,
+            max_tokens=self.max_tokens,
+        )
+        if final_summary is None:
+            raise Exception("Final reduce failed")
+        return final_summary
+
+
+    async def generate_video_summary(self,chunks: List[str],video_title:str) -> Dict[str, List[str]]:
+
+        total_summaries =  await self._run_scheduled_tasks(chunks=chunks)
+
+        final_summary = await self._tree_reduce(summaries=total_summaries, video_title=video_title)
         print(f"final summay: {final_summary} ")
         return final_summary
 
 
+    async def summarize_conversation(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Fold chat messages into the chat memory with one direct call. It bypasses the llm cache, whose entries
+        outlive a deleted chat, and the map-reduce scheduler, whose quota is kept for video ingestion.
+        """
+        if self.client is None:
+            raise Exception("LiteLLMProvider not connected")
+        max_tokens = get_settings().CHAT_MEMORY_MAX_TOKENS
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        response = await self._map_reduce_completion(
+            [
+                {"role": "system", "content": MEMORY_PROMPT.format(max_words=int(max_tokens * 0.6))},
+                {"role": "user", "content": f"Current memory:\n{previous_summary or '(empty)'}\n\nNew messages:\n{transcript}"}
+            ],
+            temperature=0.0,
+            max_tokens=max_tokens,
+        )
+        summary = response.choices[0].message.content if response and response.choices else None
+        if not summary or not summary.strip():
+            raise Exception("Conversation summary failed")
+        return summary.strip()
@@ -0,0 +1,153 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, List
+
+import openai
+
+
+class TokenBucket:
+    """Continuously refilling bucket, `rate_per_minute` units per minute up to one minute of burst."""
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available, 0 if they are available now."""
+        self._refill()
+        # a single request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimitedScheduler:
+    """
+    Sliding window scheduler for LLM calls.
+    Calls start as soon as a concurrency slot and the request/token budgets allow it,
+    a 429 pauses every caller for the Retry-After period, and each call is retried on its own with backoff.
+    """
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int,
+                 max_retries: int = 4, base_backoff: float = 1.0, max_backoff: float = 30.0):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.lock = asyncio.Lock()
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.paused_until = 0.0
+
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failed": 0, "throttled_seconds": 0.0}
+
+
+    async def _acquire(self, tokens: int):
+        """Wait until both buckets allow the call and no Retry-After pause is active."""
+        while True:
+            async with self.lock:
+                now = time.monotonic()
+                wait = max(
+                    self.paused_until - now,
+                    self.request_bucket.wait_time(1),
+                    self.token_bucket.wait_time(tokens),
+                )
+                if wait <= 0:
+                    self.request_bucket.consume(1)
+                    self.token_bucket.consume(tokens)
+                    return
+            self.stats["throttled_seconds"] += wait
+            await asyncio.sleep(wait)
+
+
+    def _retry_after(self, error: Exception) -> float | None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            return None
+        return None
+
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], estimated_tokens: int,
+                  actual_tokens: Callable[[Any], int | None] = None) -> Any:
+        """
+        Run one call under the rate limits, retrying retryable errors.
+        `actual_tokens` reads the real usage from the result so an over-estimate is refunded to the bucket.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    await self._acquire(estimated_tokens)
+                    self.stats["calls"] += 1
+                    result = await fn()
+            except self.RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self.stats["rate_limited"] += 1
+                    pause = self._retry_after(e) or self._backoff(attempt)
+                    async with self.lock:
+                        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.stats["retries"] += 1
+                delay = self._backoff(attempt)
+                print(f"LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if actual_tokens is not None:
+                used = actual_tokens(result)
+                if used is not None and used < estimated_tokens:
+                    async with self.lock:
+                        self.token_bucket.refund(estimated_tokens - used)
+            return result
+
+
+    async def map(self, fn: Callable[[Any], Awaitable[Any]], items: List[Any],
+                  estimate: Callable[[Any], int], actual_tokens: Callable[[Any], int | None] = None) -> List[Any]:
+        """
+        Run fn over items concurrently under the limits, results keep the input order.
+        An item that still fails after its retries yields None instead of failing the others.
+        """
+        async def run_item(item):
+            try:
+                return await self.run(lambda: fn(item), estimated_tokens=estimate(item), actual_tokens=actual_tokens)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"LLM call gave up after retries: {e}")
+                return None
+
+        return await asyncio.gather(*[run_item(item) for item in items])
@@ -0,0 +1,165 @@
+import asyncio
+from collections import Counter, OrderedDict
+import json
+import math
+import os
+import re
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens, numbers and snake_case identifiers are kept whole."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index of one video. Postings are stored CSR style: the documents of term t are
+    doc_ids[term_offsets[t]:term_offsets[t + 1]] with their term frequencies in term_freqs.
+    """
+    def __init__(self, ids: list[str], texts: list[str], terms: list[str], term_offsets: np.ndarray,
+                 doc_ids: np.ndarray, term_freqs: np.ndarray, doc_lengths: np.ndarray):
+        self.ids = ids
+        self.texts = texts
+        self.terms = terms
+        self.term_to_id = {term: i for i, term in enumerate(terms)}
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+
+    @classmethod
+    def build(cls, ids: list[str], texts: list[str]) -> "BM25Index":
+        counts = [Counter(tokenize(text)) for text in texts]
+        terms = sorted({term for count in counts for term in count})
+        term_to_id = {term: i for i, term in enumerate(terms)}
+
+        postings = [(term_to_id[term], doc, tf) for doc, count in enumerate(counts) for term, tf in count.items()]
+        postings.sort()
+        term_column = np.fromiter((p[0] for p in postings), dtype=np.int64, count=len(postings))
+        doc_ids = np.fromiter((p[1] for p in postings), dtype=np.int32, count=len(postings))
+        term_freqs = np.fromiter((p[2] for p in postings), dtype=np.float32, count=len(postings))
+        term_offsets = np.concatenate(([0], np.cumsum(np.bincount(term_column, minlength=len(terms))))).astype(np.int64)
+        doc_lengths = np.fromiter((sum(count.values()) for count in counts), dtype=np.float32, count=len(counts))
+        return cls(ids, texts, terms, term_offsets, doc_ids, term_freqs, doc_lengths)
+
+
+    def search(self, query: str, top_k: int, k1: float = 1.2, b: float = 0.75) -> list[tuple[int, float]]:
+        """Return (document index, BM25 score) pairs of the best matching documents, best first."""
+        n = len(self.ids)
+        term_ids = {self.term_to_id[term] for term in tokenize(query) if term in self.term_to_id}
+        if n == 0 or not term_ids:
+            return []
+
+        scores = np.zeros(n, dtype=np.float32)
+        norm = k1 * (1 - b + b * self.doc_lengths / self.avg_doc_length)
+        for t in term_ids:
+            start, end = self.term_offsets[t], self.term_offsets[t + 1]
+            docs, tf = self.doc_ids[start:end], self.term_freqs[start:end]
+            df = end - start
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (k1 + 1) / (tf + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        k = min(top_k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+    def save(self, arrays_path: str, meta_path: str):
+        with open(arrays_path + ".tmp", "wb") as f:
+            np.savez(f, term_offsets=self.term_offsets, doc_ids=self.doc_ids,
+                     term_freqs=self.term_freqs, doc_lengths=self.doc_lengths)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "texts": self.texts, "terms": self.terms}, f, ensure_ascii=False)
+        os.replace(arrays_path + ".tmp", arrays_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+    @classmethod
+    def load(cls, arrays_path: str, meta_path: str) -> "BM25Index":
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with np.load(arrays_path) as arrays:
+            return cls(meta["ids"], meta["texts"], meta["terms"], arrays["term_offsets"],
+                       arrays["doc_ids"], arrays["term_freqs"], arrays["doc_lengths"])
+
+
+class BM25Store:
+    """
+    Per-video BM25 indexes saved under `directory`, with the most recently used ones kept in memory.
+    Records use the same ids and texts as the vector db, so lexical and dense hits can be fused by id.
+    """
+    def __init__(self, directory: str, max_loaded: int = 256, k1: float = 1.2, b: float = 0.75):
+        self.directory = directory
+        self.max_loaded = max_loaded
+        self.k1 = k1
+        self.b = b
+        self.loaded: OrderedDict[str, BM25Index] = OrderedDict()
+
+
+    def connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+
+    def _paths(self, video_id: str) -> tuple[str, str]:
+        return (os.path.join(self.directory, f"{video_id}.bm25.npz"),
+                os.path.join(self.directory, f"{video_id}.bm25.json"))
+
+
+    def _get_index(self, video_id: str) -> BM25Index | None:
+        index = self.loaded.get(video_id)
+        if index is None:
+            arrays_path, meta_path = self._paths(video_id)
+            if not os.path.exists(arrays_path) or not os.path.exists(meta_path):
+                return None
+            index = BM25Index.load(arrays_path, meta_path)
+            self.loaded[video_id] = index
+            while len(self.loaded) > self.max_loaded:
+                self.loaded.popitem(last=False)
+        self.loaded.move_to_end(video_id)
+        return index
+
+
+    def _build(self, embedding_ready_data: list, video_id: str) -> int:
+        ids, texts = [], []
+        for i, item in enumerate(embedding_ready_data):
+            ids.append(f"{video_id}_chunk_{i}")
+            texts.append(f"From {item['duration']['start']} to {item['duration']['end']}: {item['text']}")
+        index = BM25Index.build(ids, texts)
+        index.save(*self._paths(video_id))
+        self.loaded.pop(video_id, None)
+        return len(index.terms)
+
+
+    async def index(self, embedding_ready_data: list, video_id: str):
+        """Build and save the index of a video from the same chunks given to the vector db."""
+        video_id = str(video_id)
+        terms = await asyncio.to_thread(self._build, embedding_ready_data, video_id)
+        print(f"Built lexical index of video {video_id}: {len(embedding_ready_data)} chunks, {terms} terms")
+
+
+    async def search(self, user_query: str, top_k: int, video_id: str):
+        """BM25 top-k of the video, returned in the vector db search response shape."""
+        video_id = str(video_id)
+        index = await asyncio.to_thread(self._get_index, video_id)
+        if index is None:
+            return {"result": {"hits": []}}
+        hits = [
+            {"_id": index.ids[i], "_score": score, "fields": {"text": index.texts[i], "source": video_id}}
+            for i, score in index.search(user_query, top_k, k1=self.k1, b=self.b)
+        ]
+        return {"result": {"hits": hits}}
+
+
+    async def delete(self, video_id: str):
+        video_id = str(video_id)
+        self.loaded.pop(video_id, None)
+        for path in self._paths(video_id):
+            if os.path.exists(path):
+                os.remove(path)
@@ -7,4 +7,14 @@ Focus on the sequence of main topics, key facts, and concepts as they appear in
 Avoid repetition, speculation, or adding information not present in the original summaries.
 
 Respond with the final summary ONLY, with no introduction or conclusion.
-"""
\ No newline at end of file
+"""
+
+PARTIAL_REDUCE_PROMPT = """
+You are given consecutive segment summaries from one part of a single AskTube video titled "{video_title}".
+
+Merge them into one summary of this part (no more than {max_part_words} words), keeping the order in which the topics appear.
+Keep every key fact, concept and step, drop repetition. It will later be combined with the summaries of the other parts of the video.
+Write in the SAME language as the input summaries.
+
+Respond with the merged summary ONLY, with no introduction or conclusion.
+"""
@@ -0,0 +1,41 @@
+import re
+import numpy as np
+from ..embedding.embedding_interface import EmbeddingInterface
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class LocalReranker:
+    """
+    Cheap in-process reranking of a candidate pool. Each candidate is scored by the share of query terms
+    it contains and, when an embedding provider is given, by the cosine similarity of the embeddings;
+    the two scores are averaged. Ties keep the candidate order of the first stage.
+    """
+    def __init__(self, embedding: EmbeddingInterface = None, lexical_weight: float = 0.5):
+        self.embedding = embedding
+        self.lexical_weight = lexical_weight if embedding is not None else 1.0
+
+
+    def _lexical_scores(self, query: str, texts: list[str]) -> np.ndarray:
+        terms = set(TOKEN_PATTERN.findall(query.lower()))
+        if not terms:
+            return np.zeros(len(texts), dtype=np.float32)
+        return np.fromiter(
+            (len(terms & set(TOKEN_PATTERN.findall(text.lower()))) / len(terms) for text in texts),
+            dtype=np.float32,
+            count=len(texts),
+        )
+
+
+    async def rerank(self, query: str, hits: list[dict], top_n: int) -> list[dict]:
+        """Return the top_n hits by local score, with the score written in _score."""
+        if not hits:
+            return []
+        texts = [hit["fields"].get("text", "") for hit in hits]
+        scores = self.lexical_weight * self._lexical_scores(query, texts)
+        if self.embedding is not None:
+            vectors = await self.embedding.embed([query] + texts)
+            scores += (1 - self.lexical_weight) * (vectors[1:] @ vectors[0])
+
+        order = np.argsort(-scores, kind="stable")[:top_n]
+        return [{"_id": hits[i]["_id"], "_score": float(scores[i]), "fields": hits[i]["fields"]} for i in order]
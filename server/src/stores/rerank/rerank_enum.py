@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class RerankMode(str, Enum):
+    REMOTE = "remote"
+    LOCAL = "local"
+    NONE = "none"
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import shutil
+import numpy as np
+from ..vectordb_interface import VectorDBInterface
+from ...embedding.embedding_interface import EmbeddingInterface
+from ...rerank.local_reranker import LocalReranker
+from ...rerank.rerank_enum import RerankMode
+from ....utils.settings import get_settings
+
+
+class NumpyVectorDB(VectorDBInterface):
+    """
+    In-process vector store. Each video is its own partition: a float32 matrix of L2 normalized
+    embeddings saved as .npy and memory-mapped on load, plus a json file with the record ids and texts.
+    Search is a matrix-vector product over the video partition followed by an argpartition top-k.
+    """
+    def __init__(self, embedding: EmbeddingInterface):
+        self.directory = get_settings().NUMPY_VECTOR_DIR
+        self.embedding = embedding
+        self.search_candidates = get_settings().SEARCH_CANDIDATES
+        self.rerank_mode = get_settings().RERANK_MODE
+        self.local_reranker = LocalReranker(embedding=embedding)
+        self.partitions: dict[str, tuple[np.ndarray, dict]] = {}
+        self.write_lock = asyncio.Lock()
+
+
+    async def connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return
+
+
+    async def disconnect(self):
+        self.partitions = {}
+        return
+
+
+    def _paths(self, video_id: str, directory: str = None) -> tuple[str, str]:
+        directory = directory or self.directory
+        return os.path.join(directory, f"{video_id}.npy"), os.path.join(directory, f"{video_id}.json")
+
+
+    def _load_partition(self, video_id: str) -> tuple[np.ndarray, dict] | None:
+        partition = self.partitions.get(video_id)
+        if partition is not None:
+            return partition
+        matrix_path, meta_path = self._paths(video_id)
+        if not os.path.exists(matrix_path) or not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        partition = (np.load(matrix_path, mmap_mode="r"), meta)
+        self.partitions[video_id] = partition
+        return partition
+
+
+    def _write_partition(self, video_id: str, matrix: np.ndarray, meta: dict):
+        """Write to temporary files and rename, so a reader never sees a half written partition."""
+        matrix_path, meta_path = self._paths(video_id)
+        with open(matrix_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+    async def _embed_reusing(self, video_id: str, texts: list[str]) -> np.ndarray:
+        """Embed texts, copying the stored vector of every text already indexed for the video by the same model."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        partition = self._load_partition(video_id)
+        previous = {}
+        if partition is not None and partition[1].get("embedding") == self.embedding.name:
+            previous = {text: row for row, text in enumerate(partition[1]["texts"])}
+
+        missing = [text for text in texts if text not in previous]
+        computed = dict(zip(missing, await self.embedding.embed(missing))) if missing else {}
+        print(f"Reused {len(texts) - len(missing)} of {len(texts)} vectors of video {video_id}")
+        return np.stack([
+            computed[text] if text in computed else np.asarray(partition[0][previous[text]])
+            for text in texts
+        ]).astype(np.float32)
+
+
+    async def index(self, embedding_ready_data: list, video_id: str, on_progress=None):
+        video_id = str(video_id)
+        ids, texts = [], []
+        for i, item in enumerate(embedding_ready_data):
+            ids.append(f"{video_id}_chunk_{i}")
+            texts.append(f"From {item['duration']['start']} to {item['duration']['end']}: {item['text']}")
+
+        matrix = await self._embed_reusing(video_id, texts)
+        async with self.write_lock:
+            await asyncio.to_thread(self._write_partition, video_id, matrix, {"ids": ids, "texts": texts, "embedding": self.embedding.name})
+            self.partitions.pop(video_id, None)
+        if on_progress is not None:
+            on_progress(len(ids), len(ids))
+        return
+
+
+    def _pool_size(self, top_k: int, candidates: int | None, rerank: str | None) -> tuple[int, bool]:
+        """Candidate pool size and whether the local reranker runs, there is no remote reranker in process."""
+        if (rerank or self.rerank_mode) == RerankMode.NONE.value:
+            return top_k, False
+        return max(candidates or self.search_candidates, top_k), True
+
+
+    async def search(self, user_query: str, top_k: int, video_id: str, candidates: int = None, rerank: str = None):
+        """Cosine top-k inside the video partition, returned in the pinecone search response shape.
+        Unless rerank is 'none', a pool of `candidates` hits is reranked locally ('remote' is served by the local reranker)."""
+        video_id = str(video_id)
+        pool, reranked = self._pool_size(top_k, candidates, rerank)
+        partition = self._load_partition(video_id)
+        if partition is None:
+            return {"result": {"hits": []}}
+        matrix, meta = partition
+        if matrix.shape[0] == 0:
+            return {"result": {"hits": []}}
+
+        query = await self.embedding.embed_query(user_query)
+        if query.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Video {video_id} was indexed with embeddings of size {matrix.shape[1]}, query has {query.shape[0]}")
+        scores = matrix @ query
+        k = min(pool, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        hits = [
+            {
+                "_id": meta["ids"][i],
+                "_score": float(scores[i]),
+                "fields": {"text": meta["texts"][i], "source": video_id},
+            }
+            for i in top
+        ]
+        if reranked:
+            hits = await self.local_reranker.rerank(user_query, hits, top_k)
+        return {"result": {"hits": hits}}
+
+
+    async def search_many(self, queries: list[str], top_k: int, video_ids: list[str], max_concurrency: int = None,
+                          candidates: int = None, rerank: str = None) -> list[list[dict]]:
+        """All queries are embedded in one batch and scored against each video with one matrix product."""
+        pool, reranked = self._pool_size(top_k, candidates, rerank)
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return []
+        query_matrix = await self.embedding.embed(unique_queries)
+        per_query: dict[str, list[list[dict]]] = {query: [] for query in unique_queries}
+
+        for video_id in dict.fromkeys(str(video_id) for video_id in video_ids):
+            partition = self._load_partition(video_id)
+            if partition is None or partition[0].shape[0] == 0:
+                continue
+            matrix, meta = partition
+            # (chunks, queries) scores of the video
+            scores = matrix @ query_matrix.T
+            k = min(pool, scores.shape[0])
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            for column, query in enumerate(unique_queries):
+                rows = top[:, column]
+                rows = rows[np.argsort(-scores[rows, column])]
+                per_query[query].append([
+                    {"_id": meta["ids"][i], "_score": float(scores[i, column]), "fields": {"text": meta["texts"][i], "source": video_id}}
+                    for i in rows
+                ])
+
+        merged = {query: self.merge_hits(hit_lists, pool) for query, hit_lists in per_query.items()}
+        if reranked:
+            for query in unique_queries:
+                merged[query] = await self.local_reranker.rerank(query, merged[query], top_k)
+        return [merged[query] for query in queries]
+
+
+    async def delete(self, video_id: str) -> int:
+        video_id = str(video_id)
+        async with self.write_lock:
+            partition = self._load_partition(video_id)
+            deleted = len(partition[1]["ids"]) if partition is not None else 0
+            self.partitions.pop(video_id, None)
+            for path in self._paths(video_id):
+                if os.path.exists(path):
+                    os.remove(path)
+        print(f"Deleted {deleted} vectors of video {video_id}")
+        return deleted
+
+
+    async def list_video_ids(self) -> set[str]:
+        if not os.path.isdir(self.directory):
+            return set()
+        return {name[:-len(".npy")] for name in os.listdir(self.directory) if name.endswith(".npy")}
+
+
+    async def snapshot(self, target_directory: str) -> int:
+        """Copy every partition into target_directory, returns the number of videos copied."""
+        os.makedirs(target_directory, exist_ok=True)
+        async with self.write_lock:
+            video_ids = await self.list_video_ids()
+            for video_id in video_ids:
+                for source, target in zip(self._paths(video_id), self._paths(video_id, target_directory)):
+                    await asyncio.to_thread(shutil.copy2, source, target)
+        return len(video_ids)
+
+
+    async def restore(self, snapshot_directory: str) -> int:
+        """Replace the store content with a snapshot and drop the loaded partitions so they are reloaded."""
+        async with self.write_lock:
+            await asyncio.to_thread(shutil.rmtree, self.directory, True)
+            await asyncio.to_thread(shutil.copytree, snapshot_directory, self.directory)
+            self.partitions = {}
+        return len(await self.list_video_ids())
@@ -1,13 +1,44 @@
+import asyncio
+import json
+import random
+import zlib
+from typing import Callable
+import aiohttp
 from pinecone import PineconeAsyncio
 from pinecone.db_data import IndexAsyncio
 from ..vectordb_interface import VectorDBInterface
+from ..vectordb_enum import NamespaceLayout
+from ...embedding.embedding_interface import EmbeddingInterface
+from ...rerank.local_reranker import LocalReranker
+from ...rerank.rerank_enum import RerankMode
 from ....utils.settings import get_settings
 
 
 
+# namespace every record lived in before namespace layouts existed
+LEGACY_NAMESPACE = "default"
+
+
 class PineconeDB(VectorDBInterface):
-    def __init__(self):
+    def __init__(self, embedding: EmbeddingInterface = None):
         self.reranking_model = get_settings().PINECONE_RERANKING_MODEL
+        self.search_candidates = get_settings().SEARCH_CANDIDATES
+        self.rerank_mode = get_settings().RERANK_MODE
+        self.rerank_timeout = get_settings().RERANK_TIMEOUT_SECONDS
+        self.local_reranker = LocalReranker(embedding=embedding)
+        self.rerank_stats = {"remote": 0, "remote_timeouts": 0, "remote_errors": 0, "local": 0}
+        self.namespace_stats = {"legacy_reads": 0}
+        self.upsert_batch_size = get_settings().PINECONE_UPSERT_BATCH_SIZE
+        self.upsert_max_bytes = get_settings().PINECONE_UPSERT_MAX_BYTES
+        self.upsert_concurrency = get_settings().PINECONE_UPSERT_CONCURRENCY
+        self.upsert_max_retries = get_settings().PINECONE_UPSERT_MAX_RETRIES
+        self.search_concurrency = get_settings().PINECONE_SEARCH_CONCURRENCY
+        self.namespace_layout = get_settings().PINECONE_NAMESPACE_LAYOUT
+        self.namespace_shards = get_settings().PINECONE_NAMESPACE_SHARDS
+        # during a layout cutover, videos missing from their new namespace are read from the legacy one
+        self.dual_read = get_settings().PINECONE_DUAL_READ
+        # pinecone accepts at most 1000 ids per delete request
+        self.delete_batch_size = 1000
         self.pc=None
         self.pc_index=None
 
@@ -26,49 +57,313 @@ class PineconeDB(VectorDBInterface):
 
         return
 
-    async def index(self, embedding_ready_data: list, video_id: str):
-        # Prepare data for indexing
-        prepared_records = []
-        print(f"videoid is {video_id}")
+    def namespace_for(self, video_id: str) -> str:
+        """Namespace of a video's records under the configured layout."""
+        if self.namespace_layout == NamespaceLayout.PER_VIDEO.value:
+            return f"video-{video_id}"
+        if self.namespace_layout == NamespaceLayout.SHARDED.value:
+            return f"shard-{zlib.crc32(str(video_id).encode('utf-8')) % self.namespace_shards:04d}"
+        return LEGACY_NAMESPACE
+
+
+    def _source_filter(self, namespace: str, sources: list[str]):
+        """A per-video namespace needs no filter, shared and sharded namespaces filter on source."""
+        if namespace.startswith("video-"):
+            return None
+        return sources[0] if len(sources) == 1 else {"$in": sources}
+
+
+    def _iter_records(self, embedding_ready_data, video_id: str):
+        """Build the pinecone records lazily, one per chunk."""
         for i, item in enumerate(embedding_ready_data):
-            vector = {
+            yield {
                 "_id": f"{video_id}_chunk_{i}",
                 "text": f"From {item['duration']['start']} to {item['duration']['end']}: {item['text']}",
                 "source": str(video_id),
-                
             }
-            prepared_records.append(vector)
-        
-        # Upsert vectors to Pinecone index
-        await self.pc_index.upsert_records(namespace="default", records=prepared_records)
+
+
+    def _iter_batches(self, records):
+        """Group records into batches bounded by record count and by serialized request size."""
+        batch, batch_bytes = [], 0
+        for record in records:
+            record_bytes = len(json.dumps(record).encode("utf-8"))
+            if batch and (len(batch) >= self.upsert_batch_size or batch_bytes + record_bytes > self.upsert_max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(record)
+            batch_bytes += record_bytes
+        if batch:
+            yield batch
+
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Rate limits, server errors and transport failures, never client errors or bugs in the batch."""
+        status = getattr(error, "status", None)
+        if isinstance(status, int):
+            return status == 429 or status >= 500
+        return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, OSError))
+
+
+    async def _upsert_batch(self, batch: list, namespace: str):
+        attempt = 0
+        while True:
+            try:
+                await self.pc_index.upsert_records(namespace=namespace, records=batch)
+                return
+            except Exception as e:
+                if attempt >= self.upsert_max_retries or not self._is_retryable(e):
+                    raise
+                attempt += 1
+                delay = min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+                print(f"Upsert of {len(batch)} records failed ({e}), retry {attempt}/{self.upsert_max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+    async def index(self, embedding_ready_data: list, video_id: str, on_progress: Callable[[int, int | None], None] = None):
+        """
+        Upsert the chunks in size and count bounded batches, a few batches in flight at once,
+        each batch retried on its own. on_progress(indexed_records, total_records) is called after every batch.
+        """
+        print(f"videoid is {video_id}")
+        namespace = self.namespace_for(video_id)
+        total = len(embedding_ready_data) if hasattr(embedding_ready_data, "__len__") else None
+        semaphore = asyncio.Semaphore(self.upsert_concurrency)
+        tasks: list[asyncio.Task] = []
+        indexed = 0
+
+        async def run(batch):
+            nonlocal indexed
+            try:
+                await self._upsert_batch(batch, namespace=namespace)
+                indexed += len(batch)
+                if on_progress is not None:
+                    on_progress(indexed, total)
+            finally:
+                semaphore.release()
+
+        try:
+            for batch in self._iter_batches(self._iter_records(embedding_ready_data, video_id)):
+                # wait for a free slot before building more batches, so at most upsert_concurrency are held
+                await semaphore.acquire()
+                failed = [task for task in tasks if task.done() and task.exception() is not None]
+                if failed:
+                    semaphore.release()
+                    break
+                tasks.append(asyncio.create_task(run(batch)))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         return 
         
         
 
 
-    async def search(self, user_query: list, top_k: int,video_id: str):
+    async def _search_namespace(self, user_query: str, candidates: int, namespace: str, sources: list[str]) -> list[dict]:
+        query = {"inputs": {"text": user_query}, "top_k": candidates}
+        source_filter = self._source_filter(namespace, sources)
+        if source_filter is not None:
+            query["filter"] = {"source": source_filter}
+        results = await self.pc_index.search(namespace=namespace, query=query)
+        if not results or not results.get("result"):
+            return []
+        return [
+            {"_id": hit["_id"], "_score": hit["_score"], "fields": dict(hit["fields"])}
+            for hit in results["result"]["hits"]
+        ]
+
+
+    async def _search_candidates(self, user_query: str, candidates: int, video_ids: list[str]) -> list[dict]:
         """
-        Perform a similarity search with optional metadata filtering.
-        :param query_embedding: The embedding vector to query against.
-        :param top_k: The number of top similar results to return.
+        Dense search of the candidate pool, without the integrated rerank step.
+        Videos are grouped by namespace, one request per namespace. With dual read, videos that have no
+        hits in their namespace are searched again in the legacy shared namespace.
         """
-        filtered_results= await self.pc_index.search(
-                namespace="default", 
-                query={
-                    "inputs": {"text": user_query}, 
-                    "top_k": 10,
-                    "filter": {"source": str(video_id)},
-                },
-                rerank={
-                        "model":self.reranking_model,
-                        "top_n": top_k,
-                        "rank_fields": ["text"]
-                    }   
-                    )
-        
-        return filtered_results
+        video_ids = sorted({str(video_id) for video_id in video_ids})
+        by_namespace: dict[str, list[str]] = {}
+        for video_id in video_ids:
+            by_namespace.setdefault(self.namespace_for(video_id), []).append(video_id)
+
+        hit_lists = await asyncio.gather(*[
+            self._search_namespace(user_query, candidates, namespace, sources)
+            for namespace, sources in by_namespace.items()
+        ])
+        hits = [hit for hit_list in hit_lists for hit in hit_list]
+
+        if self.dual_read and self.namespace_layout != NamespaceLayout.SHARED.value:
+            found = {hit["fields"].get("source") for hit in hits}
+            missing = [video_id for video_id in video_ids if video_id not in found]
+            if missing:
+                self.namespace_stats["legacy_reads"] += 1
+                hits += await self._search_namespace(user_query, candidates, LEGACY_NAMESPACE, missing)
+        return self.merge_hits([hits], candidates)
+
+
+    async def _remote_rerank(self, user_query: str, hits: list[dict], top_k: int) -> list[dict]:
+        response = await self.pc.inference.rerank(
+            model=self.reranking_model,
+            query=user_query,
+            documents=[{"id": hit["_id"], "text": hit["fields"].get("text", "")} for hit in hits],
+            rank_fields=["text"],
+            top_n=top_k,
+            return_documents=False,
+        )
+        return [
+            {"_id": hits[item.index]["_id"], "_score": item.score, "fields": hits[item.index]["fields"]}
+            for item in response.data
+        ]
+
+
+    async def _rerank(self, user_query: str, hits: list[dict], top_k: int, mode: str) -> list[dict]:
+        """Rerank the candidate pool. A remote rerank slower than the latency budget, or failing, falls back to the local reranker."""
+        if not hits or mode == RerankMode.NONE.value:
+            return hits[:top_k]
+        if mode == RerankMode.REMOTE.value:
+            self.rerank_stats["remote"] += 1
+            try:
+                return await asyncio.wait_for(self._remote_rerank(user_query, hits, top_k), timeout=self.rerank_timeout)
+            except asyncio.TimeoutError:
+                self.rerank_stats["remote_timeouts"] += 1
+                print(f"Remote rerank exceeded {self.rerank_timeout}s, using the local reranker")
+            except Exception as e:
+                self.rerank_stats["remote_errors"] += 1
+                print(f"Remote rerank failed ({e}), using the local reranker")
+        self.rerank_stats["local"] += 1
+        return await self.local_reranker.rerank(user_query, hits, top_k)
+
+
+    async def search(self, user_query: str, top_k: int, video_id: str, candidates: int = None, rerank: str = None):
+        """
+        Search the chunks of one video: a dense search of `candidates` records, then a rerank down to top_k.
+        :param candidates: size of the candidate pool, SEARCH_CANDIDATES by default.
+        :param rerank: 'remote' (pinecone inference), 'local' or 'none', RERANK_MODE by default.
+        """
+        candidates = max(candidates or self.search_candidates, top_k)
+        hits = await self._search_candidates(user_query, candidates, [video_id])
+        hits = await self._rerank(user_query, hits, top_k, rerank or self.rerank_mode)
+        return {"result": {"hits": hits}}
+
+
+    async def search_many(self, queries: list[str], top_k: int, video_ids: list[str], max_concurrency: int = None,
+                          candidates: int = None, rerank: str = None) -> list[list[dict]]:
+        """
+        One search per distinct query, the videos of a namespace are matched together with a $in filter on source.
+        Requests run concurrently under a semaphore, results come back in input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.search_concurrency)
+        unique_queries = list(dict.fromkeys(queries))
+        candidates = max(candidates or self.search_candidates, top_k)
+
+        async def run(query: str) -> list[dict]:
+            async with semaphore:
+                hits = await self._search_candidates(query, candidates, video_ids)
+                hits = await self._rerank(query, hits, top_k, rerank or self.rerank_mode)
+            return self.merge_hits([hits], top_k)
+
+        hits = dict(zip(unique_queries, await asyncio.gather(*[run(query) for query in unique_queries])))
+        return [hits[query] for query in queries]
+
+
+    def stats(self) -> dict:
+        return {"rerank": dict(self.rerank_stats), "namespaces": {"layout": self.namespace_layout, **self.namespace_stats}}
+
+
+    async def _list_ids(self, prefix: str = None, namespace: str = LEGACY_NAMESPACE):
+        """Yield pages of record ids, optionally only the ones starting with prefix."""
+        kwargs = {"namespace": namespace}
+        if prefix:
+            kwargs["prefix"] = prefix
+        async for ids in self.pc_index.list(**kwargs):
+            yield ids
+
+
+    async def _delete_prefix(self, video_id: str, namespace: str) -> int:
+        """Delete the records of a video in one namespace by listing its `{video_id}_chunk_` id prefix."""
+        deleted = 0
+        batch = []
+        async for ids in self._list_ids(prefix=f"{video_id}_chunk_", namespace=namespace):
+            batch.extend(ids)
+            while len(batch) >= self.delete_batch_size:
+                await self.pc_index.delete(ids=batch[:self.delete_batch_size], namespace=namespace)
+                deleted += len(batch[:self.delete_batch_size])
+                batch = batch[self.delete_batch_size:]
+        if batch:
+            await self.pc_index.delete(ids=batch, namespace=namespace)
+            deleted += len(batch)
+        return deleted
+
+
+    async def delete(self, video_id: str) -> int:
+        """Delete every record of the video from its namespace, and from the legacy one whenever the layout is not shared,
+        so records left there by an unfinished migration (which list_video_ids reports) are purged whether or not dual read is on."""
+        namespaces = {self.namespace_for(video_id)}
+        if self.namespace_layout != NamespaceLayout.SHARED.value:
+            namespaces.add(LEGACY_NAMESPACE)
+        deleted = 0
+        for namespace in namespaces:
+            deleted += await self._delete_prefix(video_id, namespace)
+        print(f"Deleted {deleted} vectors of video {video_id}")
+        return deleted
+
+
+    async def _list_namespaces(self) -> list[str]:
+        stats = await self.pc_index.describe_index_stats()
+        return list(stats.namespaces.keys())
+
+
+    async def list_video_ids(self) -> set[str]:
+        """Ids of every video that has records in any namespace of the index."""
+        video_ids = set()
+        for namespace in await self._list_namespaces():
+            async for ids in self._list_ids(namespace=namespace):
+                for record_id in ids:
+                    video_id, sep, _ = record_id.partition("_chunk_")
+                    if sep:
+                        video_ids.add(video_id)
+        return video_ids
+
+
+    async def migrate_namespaces(self, batch_size: int = 100, dry_run: bool = False, video_ids: set[str] = None) -> dict:
+        """
+        Move the records of the legacy shared namespace to the namespaces of the configured layout, online.
+        Each batch is fetched with its vectors, upserted in the target namespaces and only then deleted from
+        the legacy namespace, so with dual read on every record stays searchable during the move.
+        """
+        if self.namespace_layout == NamespaceLayout.SHARED.value:
+            raise ValueError("PINECONE_NAMESPACE_LAYOUT is 'shared', there is nothing to migrate to")
+
+        moved, skipped = 0, 0
+        pending: list[str] = []
+
+        async def move(ids: list[str]):
+            nonlocal moved
+            fetched = await self.pc_index.fetch(ids=ids, namespace=LEGACY_NAMESPACE)
+            by_namespace: dict[str, list] = {}
+            for record_id, vector in fetched.vectors.items():
+                video_id = record_id.partition("_chunk_")[0]
+                by_namespace.setdefault(self.namespace_for(video_id), []).append(
+                    {"id": record_id, "values": vector.values, "metadata": vector.metadata}
+                )
+            for namespace, vectors in by_namespace.items():
+                await self.pc_index.upsert(vectors=vectors, namespace=namespace)
+            await self.pc_index.delete(ids=ids, namespace=LEGACY_NAMESPACE)
+            moved += len(ids)
+            print(f"Moved {moved} records out of the '{LEGACY_NAMESPACE}' namespace")
 
+        # collect the ids first, deleting while paginating the same namespace would shift the pages
+        async for ids in self._list_ids(namespace=LEGACY_NAMESPACE):
+            for record_id in ids:
+                video_id, sep, _ = record_id.partition("_chunk_")
+                if not sep or (video_ids is not None and video_id not in video_ids):
+                    skipped += 1
+                    continue
+                pending.append(record_id)
 
-    def delete(self, video_id):
-        pass 
\ No newline at end of file
+        if not dry_run:
+            for start in range(0, len(pending), batch_size):
+                await move(pending[start:start + batch_size])
+        return {"layout": self.namespace_layout, "records": len(pending), "moved": moved, "skipped": skipped, "dry_run": dry_run}
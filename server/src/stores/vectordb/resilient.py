@@ -0,0 +1,226 @@
+import asyncio
+from collections import deque
+import time
+from typing import Awaitable, Callable
+import numpy as np
+from .vectordb_interface import VectorDBInterface
+
+# fallback(user_query, top_k, video_id) -> hits
+SearchFallback = Callable[[str, int, str], Awaitable[list[dict]]]
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through, `failure_threshold` consecutive failures open the breaker.
+    open: calls are refused for `reset_seconds`, then one probe call is let through (half open).
+    half open: the probe succeeding closes the breaker, failing opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+
+    def release_probe(self):
+        """A probe that ended without an outcome (cancelled) lets the next call probe instead."""
+        self.probe_in_flight = False
+
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                print(f"Vector db circuit breaker opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientVectorDB(VectorDBInterface):
+    """
+    Wraps a vector db so a slow or failing provider never stalls a chat turn:
+    - every search has a deadline,
+    - optionally a second identical request is sent once the first one is slower than the observed p95 (hedging),
+    - a circuit breaker stops calling a provider that keeps failing,
+    - while the breaker is open, or when a call fails, searches are served by the local fallback
+      and the response carries "fallback": True.
+    Writes and deletes are passed through unchanged.
+    """
+    def __init__(self, vector_db: VectorDBInterface, fallback: SearchFallback = None, deadline_seconds: float = 3.0,
+                 hedging: bool = False, hedge_min_samples: int = 20, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.vector_db = vector_db
+        self.fallback = fallback
+        self.deadline_seconds = deadline_seconds
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=reset_seconds)
+        self.latencies: deque[float] = deque(maxlen=500)
+        self.counters = {"calls": 0, "failures": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0,
+                         "fallbacks": 0, "fallback_errors": 0, "short_circuited": 0}
+
+
+    def __getattr__(self, name):
+        # provider specific helpers (snapshot, migrate_namespaces, ...) are reached through the wrapper
+        return getattr(self.vector_db, name)
+
+
+    async def connect(self):
+        return await self.vector_db.connect()
+
+
+    async def disconnect(self):
+        return await self.vector_db.disconnect()
+
+
+    async def index(self, embedding_ready_data: list, video_id: str, on_progress=None):
+        return await self.vector_db.index(embedding_ready_data=embedding_ready_data, video_id=video_id, on_progress=on_progress)
+
+
+    async def delete(self, video_id: str):
+        return await self.vector_db.delete(video_id=video_id)
+
+
+    async def list_video_ids(self):
+        return await self.vector_db.list_video_ids()
+
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(np.fromiter(self.latencies, dtype=np.float64), 95))
+
+
+    async def _hedged(self, call: Callable[[], Awaitable], hedge: bool):
+        """Run the call, and a second copy if the first is slower than the p95; the first result wins."""
+        delay = self.p95() if self.hedging and hedge else None
+        first = asyncio.create_task(call())
+        tasks = [first]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.counters["hedges"] += 1
+                    tasks.append(asyncio.create_task(call()))
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next(iter(done))
+                remaining = [task for task in tasks if task is not winner]
+                # a failed copy only counts once every copy failed
+                if winner.exception() is not None and remaining:
+                    tasks = remaining
+                    continue
+                if winner is not first:
+                    self.counters["hedge_wins"] += 1
+                return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+    async def _call(self, call: Callable[[], Awaitable], hedge: bool = True):
+        """Deadline, hedging and breaker bookkeeping around one provider call, raises on failure."""
+        self.counters["calls"] += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._hedged(call, hedge), timeout=self.deadline_seconds)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.counters["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            # cancelled by the caller (discarded speculative search, client disconnect), not a provider failure
+            self.breaker.release_probe()
+            raise
+        self.latencies.append(time.monotonic() - started)
+        self.breaker.record_success()
+        return result
+
+
+    async def _fallback_hits(self, user_query: str, top_k: int, video_id: str) -> list[dict]:
+        if self.fallback is None:
+            return []
+        self.counters["fallbacks"] += 1
+        try:
+            return await self.fallback(user_query, top_k, str(video_id))
+        except Exception as e:
+            self.counters["fallback_errors"] += 1
+            print(f"Local retrieval fallback failed: {e}")
+            return []
+
+
+    async def search(self, user_query: str, top_k: int, video_id: str, candidates: int = None, rerank: str = None):
+        if self.breaker.allow():
+            try:
+                return await self._call(lambda: self.vector_db.search(
+                    user_query=user_query, top_k=top_k, video_id=video_id, candidates=candidates, rerank=rerank
+                ))
+            except Exception as e:
+                print(f"Vector search failed ({type(e).__name__}: {e}), serving it from the local fallback")
+        else:
+            self.counters["short_circuited"] += 1
+        # flagged so callers do not cache the degraded result
+        return {"result": {"hits": await self._fallback_hits(user_query, top_k, video_id)}, "fallback": True}
+
+
+    async def search_many(self, queries: list[str], top_k: int, video_ids: list[str], max_concurrency: int = None,
+                          candidates: int = None, rerank: str = None) -> list[list[dict]]:
+        if self.breaker.allow():
+            try:
+                return await self._call(lambda: self.vector_db.search_many(
+                    queries, top_k, video_ids, max_concurrency=max_concurrency, candidates=candidates, rerank=rerank
+                ), hedge=False)
+            except Exception as e:
+                print(f"Vector search_many failed ({type(e).__name__}: {e}), serving it from the local fallback")
+        else:
+            self.counters["short_circuited"] += 1
+
+        results = []
+        for query in queries:
+            hit_lists = await asyncio.gather(*[self._fallback_hits(query, top_k, video_id) for video_id in video_ids])
+            results.append(self.merge_hits(list(hit_lists), top_k))
+        return results
+
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            **self.vector_db.stats(),
+            "resilience": {
+                "breaker_state": self.breaker.state,
+                "breaker_opened": self.breaker.times_opened,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                **self.counters,
+            },
+        }
@@ -2,4 +2,11 @@ from enum import Enum
 
 
 class VectorDBType(str, Enum):
-    PINECONE = "pinecone"
\ No newline at end of file
+    PINECONE = "pinecone"
+    NUMPY = "numpy"
+
+
+class NamespaceLayout(str, Enum):
+    SHARED = "shared"
+    PER_VIDEO = "per_video"
+    SHARDED = "sharded"
\ No newline at end of file
@@ -1,13 +1,19 @@
 from .vectordb_enum import VectorDBType
 from .providers.pinecone import PineconeDB
+from .providers.local_numpy import NumpyVectorDB
+from ..embedding.embedding_interface import EmbeddingInterface
 
 
 class VectorDBFactory:
     def __init__(self):
         pass
 
-    def create_vectordb(self, db_type: VectorDBType):
+    def create_vectordb(self, db_type: VectorDBType, embedding: EmbeddingInterface = None):
         if db_type == VectorDBType.PINECONE.value:
-            return PineconeDB()
+            return PineconeDB(embedding=embedding)
+        elif db_type == VectorDBType.NUMPY.value:
+            if embedding is None:
+                raise ValueError("The numpy vector database needs an embedding provider")
+            return NumpyVectorDB(embedding=embedding)
         else:
             raise ValueError(f"Unsupported vector database type: {db_type}")
\ No newline at end of file
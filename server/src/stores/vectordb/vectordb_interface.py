@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import asyncio
 
 
 class VectorDBInterface(ABC):
@@ -14,7 +15,7 @@ class VectorDBInterface(ABC):
         pass
 
     @abstractmethod
-    def index(self, embedding_ready_data: list, video_id: str):
+    def index(self, embedding_ready_data: list, video_id: str, on_progress=None):
         """Insert a vector with associated metadata into the database.
         Args:
             embedding_ready_data (list): A list of dictionaries containing 'text' and 'duration' of start and end in seconds.
@@ -30,18 +31,66 @@ class VectorDBInterface(ABC):
                 ...
             ]
             video_id (str): The ID of the video associated with the embeddings.
+            on_progress (Callable[[int, int | None], None]): Optional callback called with
+                (indexed_records, total_records) as batches are written.
         """
         pass
 
 
     @abstractmethod
-    def search(self,user_query: str, top_k: int,video_id: str):
-        """Query the database for similar vectors."""
+    def search(self,user_query: str, top_k: int,video_id: str, candidates: int = None, rerank: str = None):
+        """Query the database for similar vectors.
+        Args:
+            candidates (int): size of the first stage candidate pool, the provider default when None.
+            rerank (str): RerankMode of the second stage ('remote', 'local' or 'none'), the provider default when None.
+        """
         pass
 
+    @staticmethod
+    def merge_hits(hit_lists: list[list[dict]], top_k: int) -> list[dict]:
+        """Merge hit lists of one query, keeping the best scored hit of every _id, best first."""
+        best: dict[str, dict] = {}
+        for hits in hit_lists:
+            for hit in hits:
+                current = best.get(hit["_id"])
+                if current is None or hit.get("_score", 0.0) > current.get("_score", 0.0):
+                    best[hit["_id"]] = hit
+        return sorted(best.values(), key=lambda hit: hit.get("_score", 0.0), reverse=True)[:top_k]
+
+    async def search_many(self, queries: list[str], top_k: int, video_ids: list[str], max_concurrency: int = None,
+                          candidates: int = None, rerank: str = None) -> list[list[dict]]:
+        """Search every query in every video concurrently.
+        Returns one list of hits per query, in input order, merged across videos and deduplicated by _id.
+        Providers can override this with a native batched search."""
+        semaphore = asyncio.Semaphore(max_concurrency or 8)
+        pairs = list(dict.fromkeys((query, str(video_id)) for query in queries for video_id in video_ids))
+
+        async def run(query: str, video_id: str) -> list[dict]:
+            async with semaphore:
+                results = await self.search(user_query=query, top_k=top_k, video_id=video_id, candidates=candidates, rerank=rerank)
+            if not results or not results.get("result"):
+                return []
+            return results["result"].get("hits", [])
+
+        hits = dict(zip(pairs, await asyncio.gather(*[run(query, video_id) for query, video_id in pairs])))
+        return [
+            self.merge_hits([hits[(query, str(video_id))] for video_id in video_ids], top_k)
+            for query in queries
+        ]
+
     @abstractmethod
     def delete(self, video_id: str):
-        """Delete all assiosate recored of specific video from the database by video id."""
+        """Delete all assiosate recored of specific video from the database by video id.
+        Returns the number of deleted records."""
+        pass
+
+    def stats(self) -> dict:
+        """Provider counters exposed on /metrics, empty by default."""
+        return {}
+
+    @abstractmethod
+    def list_video_ids(self):
+        """Return the set of video ids that have records in the database, used to find orphans."""
         pass
 
     
\ No newline at end of file
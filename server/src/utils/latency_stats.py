@@ -0,0 +1,28 @@
+from collections import deque
+
+
+class LatencyStats:
+    """Rolling window of latency samples in milliseconds, reported as count, p50 and p95."""
+    def __init__(self, window: int = 500):
+        self.samples: dict[str, deque] = {}
+        self.window = window
+        self.counts: dict[str, int] = {}
+
+    def record(self, name: str, milliseconds: float):
+        self.samples.setdefault(name, deque(maxlen=self.window)).append(milliseconds)
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    @staticmethod
+    def _percentile(ordered: list[float], percentile: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+    def stats(self) -> dict:
+        result = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            result[name] = {
+                "count": self.counts[name],
+                "p50_ms": round(self._percentile(ordered, 0.5), 1),
+                "p95_ms": round(self._percentile(ordered, 0.95), 1),
+            }
+        return result
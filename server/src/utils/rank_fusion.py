@@ -0,0 +1,19 @@
+
+#  reciprocal rank fusion: merge ranked hit lists from different retrievers by id
+#  score(d) = sum over lists of 1 / (k + rank of d in the list), ranks start at 1
+
+
+def reciprocal_rank_fusion(hit_lists: list[list[dict]], top_k: int, k: int = 60) -> list[dict]:
+    """
+    Fuse lists of {'_id', '_score', 'fields'} hits. The fused score replaces '_score',
+    the fields of the first list an id appears in are kept.
+    """
+    scores: dict[str, float] = {}
+    hits_by_id: dict[str, dict] = {}
+    for hits in hit_lists:
+        for rank, hit in enumerate(hits, start=1):
+            scores[hit["_id"]] = scores.get(hit["_id"], 0.0) + 1.0 / (k + rank)
+            hits_by_id.setdefault(hit["_id"], hit)
+
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**hits_by_id[hit_id], "_score": scores[hit_id]} for hit_id in best]
@@ -13,6 +13,13 @@ class Settings(BaseSettings):
     YOUTUBE_API_KEY: str
     PREFERRED_LANGS: list[str]
     CHUNK_DURATION:int
+    CHUNK_STRATEGY: str = "duration"
+    CHUNK_TOKEN_BUDGET: int = 400
+    CHUNK_OVERLAP_SECONDS: float = 0.0
+    YOUTUBE_API_TIMEOUT: float = 10.0
+    YOUTUBE_HTTP_MAX_CONNECTIONS: int = 20
+    TRANSCRIPT_FETCH_WORKERS: int = 4
+    TRANSCRIPT_FETCH_TIMEOUT: float = 60.0
 
     # Pinecone settings
     PINECONE_API_KEY: str
@@ -20,6 +27,52 @@ class Settings(BaseSettings):
     PINECONE_EMBEDDING_MODEL: str
     PINECONE_RERANKING_MODEL: str
     PINECONE_HOST_URL:str
+    PINECONE_UPSERT_BATCH_SIZE: int = 96
+    PINECONE_UPSERT_MAX_BYTES: int = 1_500_000
+    PINECONE_UPSERT_CONCURRENCY: int = 4
+    PINECONE_UPSERT_MAX_RETRIES: int = 4
+    PINECONE_SEARCH_CONCURRENCY: int = 8
+    PINECONE_NAMESPACE_LAYOUT: str = "shared"
+    PINECONE_NAMESPACE_SHARDS: int = 64
+    PINECONE_DUAL_READ: bool = False
+    NUMPY_VECTOR_DIR: str = "vector_store"
+
+    # Embedding settings, used by the vector dbs that do not embed on their side (numpy)
+    EMBEDDING_PROVIDER: str = "hashing"
+    EMBEDDING_MODEL: str = ""
+    EMBEDDING_DIM: int = 512
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 50000
+
+    # Retrieval settings
+    SEARCH_CANDIDATES: int = 10
+    RERANK_MODE: str = "remote"
+    RERANK_TIMEOUT_SECONDS: float = 0.8
+    VECTOR_SEARCH_DEADLINE_SECONDS: float = 3.0
+    VECTOR_SEARCH_HEDGING: bool = False
+    VECTOR_SEARCH_HEDGE_MIN_SAMPLES: int = 20
+    VECTOR_BREAKER_FAILURE_THRESHOLD: int = 5
+    VECTOR_BREAKER_RESET_SECONDS: float = 30.0
+    RETRIEVAL_MODE: str = "hybrid"
+    RETRIEVAL_CANDIDATES: int = 10
+    RRF_K: int = 60
+    LEXICAL_INDEX_DIR: str = "lexical_index"
+    LEXICAL_MAX_LOADED: int = 256
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 300.0
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 2048
+    SPECULATIVE_RETRIEVAL: bool = False
+    SPECULATIVE_MATCH_THRESHOLD: float = 0.5
+
+    # Chat memory settings
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_MEMORY_MAX_TOKENS: int = 400
+    PROMPT_PREFIX_CACHE_MAX_ENTRIES: int = 512
+
+    # Semantic answer cache settings
+    ANSWER_CACHE_SIMILARITY: float = 0.92
+    ANSWER_CACHE_TTL_SECONDS: float = 24 * 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 5000
+    ANSWER_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
 
     # Litellm settings
     GROQ_API_KEY: str
@@ -27,12 +80,28 @@ class Settings(BaseSettings):
     LITELLM_BASE_MODEL:str
     LITELLM_MAP_REDUCE_MODEL:str
     OPEN_ROUTER_API_KEY:str
+    MAP_REDUCE_REQUESTS_PER_MINUTE: int = 60
+    MAP_REDUCE_TOKENS_PER_MINUTE: int = 100000
+    MAP_REDUCE_MAX_CONCURRENCY: int = 8
+    MAP_REDUCE_MAX_RETRIES: int = 4
+    REDUCE_TOKEN_BUDGET: int = 6000
+
+    # LLM output cache settings
+    LLM_CACHE_PROVIDER: str = "disk"
+    LLM_CACHE_PATH: str = "cache/llm_cache.sqlite3"
+    LLM_CACHE_MAX_ENTRIES: int = 100000
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
 
 
     # Other settings
     VECTOR_DB_PROVIDER:str
     GENERATION_MODEL_PROVIDER:str
 
+    # Ingestion settings
+    INGESTION_WORKERS: int = 2
+    INGESTION_LEASE_SECONDS: int = 120
+    INGESTION_MAX_ATTEMPTS: int = 3
+
 
 
 
@@ -0,0 +1,17 @@
+# rough token counting used for budgeting (rate limits, prompt sizes),
+# ~4 characters per token for english text without pulling a tokenizer dependency
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    """Approximate number of tokens in a text."""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_messages_tokens(messages: list[dict]) -> int:
+    """Approximate prompt tokens of a chat completion message list."""
+    # every message carries a few tokens of role/format overhead
+    return sum(estimate_tokens(str(msg.get("content") or "")) + 4 for msg in messages)